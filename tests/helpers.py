@@ -0,0 +1,72 @@
+# Copyright (C) 2024 Wildfire Games.
+# This file is part of 0 A.D.
+#
+# 0 A.D. is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# 0 A.D. is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with 0 A.D.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Helpers shared by the tests of the bots."""
+
+from unittest import IsolatedAsyncioTestCase
+
+from slixmpp.jid import JID
+
+
+class BotTestCase(IsolatedAsyncioTestCase):
+    """Base class for tests of bots in a MUC room."""
+
+    async def asyncSetUp(self):
+        """Set up the bot with the MUC plugin registered."""
+        self.room = JID("arena@conference.lobby.tld")
+        self.bot = self.create_bot()
+        self.bot.register_plugin("xep_0045")
+
+    def create_bot(self):
+        """Create the bot to test.
+
+        Returns:
+            Bot instance, which isn't connected to any server
+
+        """
+        raise NotImplementedError
+
+    def start_patch(self, patcher):
+        """Start a patch, which gets stopped after the test.
+
+        Arguments:
+            patcher: patcher as returned by unittest.mock.patch
+
+        Returns:
+            The object the patch replaced the patched object with
+
+        """
+        mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mock
+
+    def make_presence(self, nick, jid, role="participant", ptype=None):
+        """Create a presence of a user in the MUC room.
+
+        Arguments:
+            nick (str): nick of the user in the MUC room
+            jid (str): JID of the user
+            role (str): role of the user in the MUC room
+            ptype (str): type of the presence
+
+        Returns:
+            Presence stanza for the user
+
+        """
+        presence = self.bot.make_presence(pfrom=JID(f"{self.room}/{nick}"), ptype=ptype)
+        presence["muc"]["jid"] = JID(jid)
+        presence["muc"]["role"] = role
+        return presence
@@ -19,7 +19,7 @@
 import sys
 from argparse import Namespace
 from unittest import TestCase
-from unittest.mock import Mock, call, patch
+from unittest.mock import call, patch
 
 from parameterized import parameterized
 from slixmpp.jid import JID
@@ -86,8 +86,9 @@ class TestLeaderboard(TestCase):
 
     def test_get_profile_player_without_games(self):
         """Test profile retrieval for existing player."""
-        self.leaderboard.get_or_create_player(JID("john@localhost/0ad"))
-        profile = self.leaderboard.get_profile(JID("john@localhost/0ad"))
+        jid = JID("john@localhost/0ad")
+        self.leaderboard.get_or_create_player(jid)
+        profile = self.leaderboard.get_profile(jid)
         self.assertDictEqual(
             profile,
             {
@@ -120,8 +121,9 @@ class TestLeaderboard(TestCase):
         Test that the same profile gets returned, no matter whether the
         player name is provided as lower case or upper case.
         """
-        self.leaderboard.get_or_create_player(JID("john@localhost/0ad"))
-        profile1 = self.leaderboard.get_profile(JID("john@localhost/0ad"))
+        jid = JID("john@localhost/0ad")
+        self.leaderboard.get_or_create_player(jid)
+        profile1 = self.leaderboard.get_profile(jid)
         profile2 = self.leaderboard.get_profile(JID("JOHN@localhost/0ad"))
         self.assertEqual(profile1, profile2)
 
@@ -129,173 +131,176 @@ class TestLeaderboard(TestCase):
 class TestArgumentParsing(TestCase):
     """Test handling of parsing command line parameters."""
 
-    @parameterized.expand(
-        [
-            (
-                [],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="EcheLOn",
-                    xserver=None,
-                    no_verify=False,
-                    nickname="RatingsBot",
-                    password="XXXXXX",
-                    room="arena",
-                    verbosity=0,
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+    VALID_CASES = (
+        (
+            [],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="EcheLOn",
+                xserver=None,
+                no_verify=False,
+                nickname="RatingsBot",
+                password="XXXXXX",
+                room="arena",
+                verbosity=0,
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-            (
-                ["-v"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="EcheLOn",
-                    xserver=None,
-                    no_verify=False,
-                    nickname="RatingsBot",
-                    password="XXXXXX",
-                    room="arena",
-                    verbosity=1,
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+        ),
+        (
+            ["-v"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="EcheLOn",
+                xserver=None,
+                no_verify=False,
+                nickname="RatingsBot",
+                password="XXXXXX",
+                room="arena",
+                verbosity=1,
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-            (
-                ["-vv"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="EcheLOn",
-                    xserver=None,
-                    no_verify=False,
-                    nickname="RatingsBot",
-                    password="XXXXXX",
-                    room="arena",
-                    verbosity=2,
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+        ),
+        (
+            ["-vv"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="EcheLOn",
+                xserver=None,
+                no_verify=False,
+                nickname="RatingsBot",
+                password="XXXXXX",
+                room="arena",
+                verbosity=2,
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-            (
-                ["-vvv"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="EcheLOn",
-                    xserver=None,
-                    no_verify=False,
-                    nickname="RatingsBot",
-                    password="XXXXXX",
-                    room="arena",
-                    verbosity=3,
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+        ),
+        (
+            ["-vvv"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="EcheLOn",
+                xserver=None,
+                no_verify=False,
+                nickname="RatingsBot",
+                password="XXXXXX",
+                room="arena",
+                verbosity=3,
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-            (
-                ["--verbosity", "3"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="EcheLOn",
-                    xserver=None,
-                    no_verify=False,
-                    nickname="RatingsBot",
-                    password="XXXXXX",
-                    room="arena",
-                    verbosity=3,
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+        ),
+        (
+            ["--verbosity", "3"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="EcheLOn",
+                xserver=None,
+                no_verify=False,
+                nickname="RatingsBot",
+                password="XXXXXX",
+                room="arena",
+                verbosity=3,
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-            (
-                ["-m", "lobby.domain.tld"],
-                Namespace(
-                    domain="lobby.domain.tld",
-                    login="EcheLOn",
-                    verbosity=0,
-                    nickname="RatingsBot",
-                    xserver=None,
-                    no_verify=False,
-                    password="XXXXXX",
-                    room="arena",
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+        ),
+        (
+            ["-m", "lobby.domain.tld"],
+            Namespace(
+                domain="lobby.domain.tld",
+                login="EcheLOn",
+                verbosity=0,
+                nickname="RatingsBot",
+                xserver=None,
+                no_verify=False,
+                password="XXXXXX",
+                room="arena",
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-            (
-                ["--domain=lobby.domain.tld"],
-                Namespace(
-                    domain="lobby.domain.tld",
-                    login="EcheLOn",
-                    verbosity=0,
-                    nickname="RatingsBot",
-                    xserver=None,
-                    no_verify=False,
-                    password="XXXXXX",
-                    room="arena",
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+        ),
+        (
+            ["--domain=lobby.domain.tld"],
+            Namespace(
+                domain="lobby.domain.tld",
+                login="EcheLOn",
+                verbosity=0,
+                nickname="RatingsBot",
+                xserver=None,
+                no_verify=False,
+                password="XXXXXX",
+                room="arena",
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-            (
-                [
-                    "-m",
-                    "lobby.domain.tld",
-                    "-l",
-                    "bot",
-                    "-p",
-                    "123456",
-                    "-n",
-                    "Bot",
-                    "-r",
-                    "arena123",
-                    "-v",
-                ],
-                Namespace(
-                    domain="lobby.domain.tld",
-                    login="bot",
-                    verbosity=1,
-                    nickname="Bot",
-                    xserver=None,
-                    no_verify=False,
-                    password="123456",
-                    room="arena123",
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+        ),
+        (
+            [
+                "-m",
+                "lobby.domain.tld",
+                "-l",
+                "bot",
+                "-p",
+                "123456",
+                "-n",
+                "Bot",
+                "-r",
+                "arena123",
+                "-v",
+            ],
+            Namespace(
+                domain="lobby.domain.tld",
+                login="bot",
+                verbosity=1,
+                nickname="Bot",
+                xserver=None,
+                no_verify=False,
+                password="123456",
+                room="arena123",
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-            (
-                [
-                    "--domain=lobby.domain.tld",
-                    "--login=bot",
-                    "--password=123456",
-                    "--nickname=Bot",
-                    "--room=arena123",
-                    "--database-url=sqlite:////tmp/db.sqlite3",
-                ],
-                Namespace(
-                    domain="lobby.domain.tld",
-                    login="bot",
-                    verbosity=0,
-                    nickname="Bot",
-                    xserver=None,
-                    no_verify=False,
-                    password="123456",
-                    room="arena123",
-                    database_url="sqlite:////tmp/db.sqlite3",
-                ),
+        ),
+        (
+            [
+                "--domain=lobby.domain.tld",
+                "--login=bot",
+                "--password=123456",
+                "--nickname=Bot",
+                "--room=arena123",
+                "--database-url=sqlite:////tmp/db.sqlite3",
+            ],
+            Namespace(
+                domain="lobby.domain.tld",
+                login="bot",
+                verbosity=0,
+                nickname="Bot",
+                xserver=None,
+                no_verify=False,
+                password="123456",
+                room="arena123",
+                database_url="sqlite:////tmp/db.sqlite3",
             ),
-            (
-                ["--no-verify"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="EcheLOn",
-                    verbosity=0,
-                    xserver=None,
-                    no_verify=True,
-                    nickname="RatingsBot",
-                    password="XXXXXX",
-                    room="arena",
-                    database_url="sqlite:///lobby_rankings.sqlite3",
-                ),
+        ),
+        (
+            ["--no-verify"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="EcheLOn",
+                verbosity=0,
+                xserver=None,
+                no_verify=True,
+                nickname="RatingsBot",
+                password="XXXXXX",
+                room="arena",
+                database_url="sqlite:///lobby_rankings.sqlite3",
             ),
-        ]
+        ),
     )
-    def test_valid(self, cmd_args, expected_args):
+
+    def test_valid(self):
         """Test valid parameter combinations."""
-        with patch.object(sys, "argv", ["echelon", *cmd_args]):
-            self.assertEqual(expected_args, parse_args())
+        for cmd_args, expected_args in self.VALID_CASES:
+            with (
+                self.subTest(cmd_args=cmd_args),
+                patch.object(sys, "argv", ["echelon", *cmd_args]),
+            ):
+                self.assertEqual(expected_args, parse_args())
 
     @parameterized.expand([(["-f"],), (["--foo"],), (["-v", "--verbosity", "1"],)])
     def test_invalid(self, cmd_args):
@@ -307,6 +312,19 @@ class TestArgumentParsing(TestCase):
 class TestMain(TestCase):
     """Test main method."""
 
+    DEFAULT_ARGS = Namespace(
+        log_level=30,
+        login="EcheLOn",
+        domain="lobby.wildfiregames.com",
+        password="XXXXXX",
+        room="arena",
+        nickname="RatingsBot",
+        database_url="sqlite:///lobby_rankings.sqlite3",
+        xserver=None,
+        no_verify=False,
+        verbosity=0,
+    )
+
     def test_success(self):
         """Test successful execution."""
         with (
@@ -315,18 +333,7 @@ class TestMain(TestCase):
             patch("xpartamupp.echelon.EcheLOn") as xmpp_mock,
             patch("xpartamupp.echelon.asyncio") as asyncio_mock,
         ):
-            args_mock.return_value = Mock(
-                log_level=30,
-                login="EcheLOn",
-                domain="lobby.wildfiregames.com",
-                password="XXXXXX",
-                room="arena",
-                nickname="RatingsBot",
-                database_url="sqlite:///lobby_rankings.sqlite3",
-                xserver=None,
-                no_verify=False,
-                verbosity=0,
-            )
+            args_mock.return_value = self.DEFAULT_ARGS
             main()
             args_mock.assert_called_once_with()
             leaderboard_mock.assert_called_once_with("sqlite:///lobby_rankings.sqlite3")
@@ -29,22 +29,25 @@ from xpartamupp.lobby_ranking import main, parse_args
 class TestArgumentParsing(TestCase):
     """Test handling of parsing command line parameters."""
 
-    @parameterized.expand(
-        [
-            (
-                ["create"],
-                Namespace(action="create", database_url="sqlite:///lobby_rankings.sqlite3"),
-            ),
-            (
-                ["--database-url", "sqlite:////tmp/db.sqlite3", "create"],
-                Namespace(action="create", database_url="sqlite:////tmp/db.sqlite3"),
-            ),
-        ]
+    VALID_CASES = (
+        (
+            ["create"],
+            Namespace(action="create", database_url="sqlite:///lobby_rankings.sqlite3"),
+        ),
+        (
+            ["--database-url", "sqlite:////tmp/db.sqlite3", "create"],
+            Namespace(action="create", database_url="sqlite:////tmp/db.sqlite3"),
+        ),
     )
-    def test_valid(self, cmd_args, expected_args):
+
+    def test_valid(self):
         """Test valid parameter combinations."""
-        with patch.object(sys, "argv", ["echelon-db", *cmd_args]):
-            self.assertEqual(parse_args(), expected_args)
+        for cmd_args, expected_args in self.VALID_CASES:
+            with (
+                self.subTest(cmd_args=cmd_args),
+                patch.object(sys, "argv", ["echelon-db", *cmd_args]),
+            ):
+                self.assertEqual(parse_args(), expected_args)
 
     @parameterized.expand(
         [
@@ -61,6 +64,8 @@ class TestArgumentParsing(TestCase):
 class TestMain(TestCase):
     """Test main method."""
 
+    DEFAULT_ARGS = Namespace(action="create", database_url="sqlite:///lobby_rankings.sqlite3")
+
     def test_success(self):
         """Test successful execution."""
         with (
@@ -68,9 +73,7 @@ class TestMain(TestCase):
             patch("xpartamupp.lobby_ranking.create_engine") as create_engine_mock,
             patch("xpartamupp.lobby_ranking.Base") as declarative_base_mock,
         ):
-            args_mock.return_value = Mock(
-                action="create", database_url="sqlite:///lobby_rankings.sqlite3"
-            )
+            args_mock.return_value = self.DEFAULT_ARGS
             engine_mock = Mock()
             create_engine_mock.return_value = engine_mock
             main()
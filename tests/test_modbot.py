@@ -0,0 +1,507 @@
+# Copyright (C) 2024 Wildfire Games.
+# This file is part of 0 A.D.
+#
+# 0 A.D. is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# 0 A.D. is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with 0 A.D.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the moderation bot."""
+
+import asyncio
+import shlex
+from datetime import UTC, datetime, timedelta
+from unittest import TestCase
+from unittest.mock import AsyncMock, call, patch
+
+from parameterized import parameterized
+from slixmpp.exceptions import IqError
+from slixmpp.jid import JID
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from tests.helpers import BotTestCase
+from xpartamupp.lobby_moderation_db import (
+    Base,
+    JIDNickWhitelist,
+    Moderator,
+    ProfanityIncident,
+    ProfanityTerms,
+)
+from xpartamupp.modbot import (
+    ModBot,
+    parse_duration,
+    split_command,
+)
+
+
+class TestParseDuration(TestCase):
+    """Test parsing of mute durations."""
+
+    @parameterized.expand(
+        [
+            ("5m", timedelta(minutes=5)),
+            ("10h", timedelta(hours=10)),
+            ("10H", timedelta(hours=10)),
+            ("1h30m", timedelta(hours=1, minutes=30)),
+            ("1d2h3m4s", timedelta(days=1, hours=2, minutes=3, seconds=4)),
+            ("2 days 12 hours", timedelta(days=2, hours=12)),
+            ("3 weeks", timedelta(weeks=3)),
+            ("0s", timedelta(0)),
+        ]
+    )
+    def test_valid(self, duration, expected_duration):
+        """Test parsing valid durations."""
+        self.assertEqual(parse_duration(duration), expected_duration)
+
+    @parameterized.expand(
+        [
+            ("",),
+            ("5",),
+            ("m",),
+            ("-5m",),
+            ("5 foo",),
+            ("2 months",),
+            ("5 years",),
+            ("99999999999999999999d",),
+            ("9" * 5000 + "d",),
+        ]
+    )
+    def test_unsupported(self, duration):
+        """Test durations the parser doesn't support."""
+        self.assertIsNone(parse_duration(duration))
+
+
+class TestSplitCommand(TestCase):
+    """Test splitting commands into arguments."""
+
+    @parameterized.expand(
+        [
+            ("mute foo 5m spam",),
+            ('mute foo "2 months" spam',),
+            ("kick foo 'spamming a lot'",),
+            ('kick a"b c"d e',),
+            ("  leading and trailing  ",),
+            ("""empty "" ''""",),
+            ("escaped\\ space",),
+            ("\xa0  \x0b\ta",),
+            ('"escaped \\" \\\\ \\a"',),
+            ("",),
+        ]
+    )
+    def test_valid(self, command):
+        """Test splitting commands the same way as shlex does."""
+        self.assertEqual(split_command(command), shlex.split(command))
+
+    @parameterized.expand([("don't",), ('"unclosed',), ("trailing\\",)])
+    def test_invalid(self, command):
+        """Test splitting commands which shlex rejects."""
+        with self.assertRaises(ValueError):
+            shlex.split(command)
+        with self.assertRaises(ValueError):
+            split_command(command)
+
+
+class ModBotTestCase(BotTestCase):
+    """Base class for tests of ModBot instances."""
+
+    enable_profanity_monitoring = False
+
+    async def asyncSetUp(self):
+        """Set up a ModBot instance with an in-memory database."""
+        # A single connection is shared, so the database thread of
+        # ModBot sees the same in-memory database as the tests.
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(self.engine)
+        await super().asyncSetUp()
+        self.db = Session(self.engine)
+        self.set_role_mock = self.start_patch(
+            patch.object(self.bot.plugin["xep_0045"], "set_role", AsyncMock())
+        )
+
+    def create_bot(self):
+        """Create a ModBot instance using the in-memory database."""
+        with patch("xpartamupp.modbot.create_engine", return_value=self.engine):
+            return ModBot(
+                JID("modbot@lobby.tld/CC"),
+                "password",
+                "ModBot",
+                [self.room],
+                JID("moderation@conference.lobby.tld"),
+                "sqlite://",
+                enable_profanity_monitoring=self.enable_profanity_monitoring,
+            )
+
+    async def asyncTearDown(self):
+        """Close the database session and thread."""
+        self.db.close()
+        self.bot.db_executor.shutdown()
+
+
+class TestModeratorCheck(ModBotTestCase):
+    """Test checking moderator privileges for commands."""
+
+    def make_command(self, body):
+        """Create a command message sent by the moderator."""
+        msg = self.bot.make_message(
+            mto=self.bot.boundjid, mbody=body, mtype="groupchat", mfrom=f"{self.room}/moderator"
+        )
+        msg["mucnick"] = "moderator"
+        return msg
+
+    async def run_command(self, body):
+        """Run a command and return the mocked command handler."""
+        handler_mock = AsyncMock()
+        self.bot.cmd_handlers["mutelist"] = handler_mock
+        with patch.object(
+            self.bot.plugin["xep_0045"],
+            "get_jid_property",
+            return_value=JID("moderator@lobby.tld/0ad"),
+        ):
+            await self.bot._muc_command_message(self.make_command(body))
+        return handler_mock
+
+    async def test_is_moderator(self):
+        """Test checking for moderators."""
+        self.db.add(Moderator(jid="moderator@lobby.tld"))
+        self.db.commit()
+        self.assertTrue(await self.bot._is_moderator("moderator@lobby.tld"))
+        self.assertFalse(await self.bot._is_moderator("player@lobby.tld"))
+
+    async def test_added_moderator(self):
+        """Test commands of a moderator added to the database."""
+        (await self.run_command("!mutelist")).assert_not_awaited()
+
+        self.db.add(Moderator(jid="moderator@lobby.tld"))
+        self.db.commit()
+        (await self.run_command("!mutelist")).assert_awaited_once()
+
+    async def test_removed_moderator(self):
+        """Test commands of a moderator removed from the database."""
+        self.db.add(Moderator(jid="moderator@lobby.tld"))
+        self.db.commit()
+        (await self.run_command("!mutelist")).assert_awaited_once()
+
+        self.db.delete(self.db.get(Moderator, "moderator@lobby.tld"))
+        self.db.commit()
+        (await self.run_command("!mutelist")).assert_not_awaited()
+
+
+class TestCheckMatchingNick(ModBotTestCase):
+    """Test kicking users whose nick doesn't match their JID."""
+
+    async def test_matching(self):
+        """Test users whose nick matches their JID."""
+        self.assertTrue(
+            await self.bot._check_matching_nick(JID("player@lobby.tld/0ad"), "Player", self.room)
+        )
+        self.set_role_mock.assert_not_called()
+
+    async def test_whitelist_reload(self):
+        """Test reloading the whitelist before kicking users."""
+        jid = JID("player@lobby.tld/0ad")
+        self.db.add(JIDNickWhitelist(jid="player@lobby.tld"))
+        self.db.commit()
+        self.assertTrue(await self.bot._check_matching_nick(jid, "other", self.room))
+        self.set_role_mock.assert_not_called()
+
+    async def test_kick_rate_limited_reload(self):
+        """Test not reloading the whitelist for every kick."""
+        jid = JID("player@lobby.tld/0ad")
+        self.assertFalse(await self.bot._check_matching_nick(jid, "other", self.room))
+
+        self.db.add(JIDNickWhitelist(jid="player@lobby.tld"))
+        self.db.commit()
+        with patch.object(self.bot, "_get_jid_nick_whitelist") as get_whitelist_mock:
+            self.assertFalse(await self.bot._check_matching_nick(jid, "other", self.room))
+            get_whitelist_mock.assert_not_called()
+        self.assertEqual(self.set_role_mock.await_count, 2)
+
+
+class TestProfanityCheck(ModBotTestCase):
+    """Test checking chat messages for profanity."""
+
+    enable_profanity_monitoring = True
+
+    async def asyncSetUp(self):
+        """Set up ModBot with profanity terms of multiple languages."""
+        await super().asyncSetUp()
+        self.db.add_all(
+            [
+                ProfanityTerms(term="arschloch", language="de"),
+                ProfanityTerms(term="идиот", language="ru"),
+                ProfanityTerms(term="con", language="fr"),
+            ]
+        )
+        self.db.commit()
+        await self.bot._load_db_caches()
+
+    async def is_flagged(self, text):
+        """Check whether a message gets flagged as profanity.
+
+        Arguments:
+            text (str): text of the message to check
+
+        Returns:
+            True if a profanity incident got added, False otherwise
+
+        """
+        msg = self.bot.make_message(
+            mto=self.bot.boundjid, mbody=text, mtype="groupchat", mfrom=JID(f"{self.room}/player")
+        )
+        with patch.object(
+            self.bot, "_add_profanity_incident", return_value=1
+        ) as add_profanity_incident_mock:
+            await self.bot._muc_check_profanity(msg)
+        return add_profanity_incident_mock.called
+
+    @parameterized.expand([("du Arschloch",), ("ты идиот",)])
+    async def test_short_message(self, text):
+        """Test detecting profanity in short messages."""
+        self.assertTrue(await self.is_flagged(text))
+
+    async def test_other_language(self):
+        """Test ignoring profanity terms of other languages."""
+        self.assertFalse(await self.is_flagged("con gusto"))
+
+
+class TestProfanityIncidentBuffer(ModBotTestCase):
+    """Test buffering profanity incidents before writing them."""
+
+    def add_profanity_incident(self):
+        """Add a profanity incident to the buffer."""
+        self.bot._add_profanity_incident(
+            JID("player@lobby.tld/0ad"), "arena", "badword", ["badword"], ("en",)
+        )
+
+    def count_profanity_incidents(self):
+        """Count the profanity incidents in the database."""
+        return self.db.scalar(select(func.count()).select_from(ProfanityIncident))
+
+    @patch("xpartamupp.modbot.PROFANITY_INCIDENT_FLUSH_SECONDS", 0)
+    async def test_flush(self):
+        """Test writing buffered incidents in a single batch."""
+        self.add_profanity_incident()
+        self.add_profanity_incident()
+        self.assertEqual(self.count_profanity_incidents(), 0)
+        await self.bot.profanity_incident_flush_task
+        self.assertEqual(self.count_profanity_incidents(), 2)
+        self.assertIsNone(self.bot.profanity_incident_flush_task)
+
+    @patch("xpartamupp.modbot.PROFANITY_INCIDENT_FLUSH_SECONDS", 0)
+    async def test_flush_failed(self):
+        """Test keeping incidents which couldn't be written."""
+        with patch.object(self.bot, "db_session", side_effect=SQLAlchemyError):
+            self.add_profanity_incident()
+            await self.bot.profanity_incident_flush_task
+        self.assertEqual(len(self.bot.profanity_incident_buffer), 1)
+
+        await self.bot.profanity_incident_flush_task
+        self.assertEqual(self.count_profanity_incidents(), 1)
+        self.assertEqual(self.bot.profanity_incident_buffer, [])
+
+    @patch("xpartamupp.modbot.PROFANITY_INCIDENT_MAX_RETRY_SECONDS", 8)
+    async def test_retry_backoff(self):
+        """Test doubling the delay between failed writes."""
+        delays = []
+        sleep = asyncio.sleep
+
+        async def record_delay(delay):
+            delays.append(delay)
+            await sleep(0)
+
+        with (
+            patch("xpartamupp.modbot.asyncio.sleep", side_effect=record_delay),
+            self.assertLogs("xpartamupp.modbot", level="DEBUG") as logs,
+        ):
+            with patch.object(self.bot, "db_session", side_effect=SQLAlchemyError):
+                self.add_profanity_incident()
+                for _ in range(5):
+                    await self.bot.profanity_incident_flush_task
+            await self.bot.profanity_incident_flush_task
+            self.add_profanity_incident()
+            await self.bot.profanity_incident_flush_task
+
+        self.assertEqual(delays, [2, 4, 8, 8, 8, 8, 2])
+        self.assertEqual(
+            [record.levelname for record in logs.records if "failed" in record.getMessage()],
+            ["ERROR", "DEBUG", "DEBUG", "DEBUG", "DEBUG"],
+        )
+        self.assertEqual(self.count_profanity_incidents(), 2)
+
+    @patch("xpartamupp.modbot.MAX_BUFFERED_PROFANITY_INCIDENTS", 2)
+    @patch("xpartamupp.modbot.PROFANITY_INCIDENT_FLUSH_SECONDS", 0)
+    async def test_buffer_limit(self):
+        """Test dropping the oldest incidents over the limit."""
+        with patch.object(self.bot, "db_session", side_effect=SQLAlchemyError):
+            self.add_profanity_incident()
+            await self.bot.profanity_incident_flush_task
+            self.add_profanity_incident()
+            with self.assertLogs("xpartamupp.modbot", level="WARNING") as logs:
+                self.add_profanity_incident()
+        self.assertIn("Dropped 1 buffered profanity incidents", logs.output[0])
+        self.assertEqual(len(self.bot.profanity_incident_buffer), 2)
+
+        await self.bot.profanity_incident_flush_task
+        self.assertEqual(self.count_profanity_incidents(), 2)
+
+    async def test_shutdown(self):
+        """Test writing buffered incidents when shutting down."""
+        self.add_profanity_incident()
+        with patch.object(self.bot, "abort"):
+            await self.bot._shutdown(None)
+        self.assertEqual(self.count_profanity_incidents(), 1)
+        self.assertIsNone(self.bot.profanity_incident_flush_task)
+
+
+class TestRoomNicks(ModBotTestCase):
+    """Test keeping track of the nicks in MUC rooms."""
+
+    async def test_join(self):
+        """Test adding the nicks of joining users."""
+        await self.bot._muc_presence_change(self.make_presence("Player", "player@lobby.tld/0ad"))
+        self.assertEqual(self.bot.room_nicks[str(self.room)], {"player": "Player"})
+        self.assertEqual(self.bot._get_nick_with_proper_case("PLAYER", self.room), "Player")
+
+    async def test_leave(self):
+        """Test removing the nicks of leaving users."""
+        await self.bot._muc_presence_change(self.make_presence("Player", "player@lobby.tld/0ad"))
+        await self.bot._muc_presence_change(
+            self.make_presence("Player", "player@lobby.tld/0ad", ptype="unavailable")
+        )
+        self.assertEqual(self.bot.room_nicks[str(self.room)], {})
+        self.assertIsNone(self.bot._get_nick_with_proper_case("player", self.room))
+
+    async def test_nick_change(self):
+        """Test changing the case of a nick."""
+        await self.bot._muc_presence_change(self.make_presence("Player", "player@lobby.tld/0ad"))
+        await self.bot._muc_presence_change(
+            self.make_presence("Player", "player@lobby.tld/0ad", ptype="unavailable")
+        )
+        await self.bot._muc_presence_change(self.make_presence("PLAYER", "player@lobby.tld/0ad"))
+        self.assertEqual(self.bot.room_nicks[str(self.room)], {"player": "PLAYER"})
+
+    async def test_nick_change_late_leave(self):
+        """Test keeping a new nick when the old one leaves later."""
+        await self.bot._muc_presence_change(self.make_presence("PLAYER", "player@lobby.tld/0ad"))
+        await self.bot._muc_presence_change(
+            self.make_presence("Player", "player@lobby.tld/0ad", ptype="unavailable")
+        )
+        self.assertEqual(self.bot.room_nicks[str(self.room)], {"player": "PLAYER"})
+
+
+class TestMuteOnJoin(ModBotTestCase):
+    """Test setting the mute state of joining users."""
+
+    async def test_muted(self):
+        """Test muting users whose mute didn't end yet."""
+        self.bot.active_mutes["player@lobby.tld"] = (
+            datetime.now(tz=UTC) + timedelta(hours=1),
+            "spam",
+        )
+        await self.bot._muc_presence_change(self.make_presence("Player", "player@lobby.tld/0ad"))
+        self.set_role_mock.assert_awaited_once_with(
+            str(self.room), "Player", "visitor", reason="spam"
+        )
+
+    async def test_mute_ended(self):
+        """Test unmuting users whose mute ended."""
+        self.bot.active_mutes["player@lobby.tld"] = (
+            datetime.now(tz=UTC) - timedelta(seconds=1),
+            "spam",
+        )
+        await self.bot._muc_presence_change(
+            self.make_presence("Player", "player@lobby.tld/0ad", role="visitor")
+        )
+        self.set_role_mock.assert_awaited_once_with(str(self.room), "Player", "participant")
+
+    @parameterized.expand([("participant",), ("moderator",)])
+    async def test_not_muted(self, role):
+        """Test not changing the role of users who aren't muted."""
+        await self.bot._muc_presence_change(
+            self.make_presence("Player", "player@lobby.tld/0ad", role=role)
+        )
+        self.set_role_mock.assert_not_called()
+
+
+class TestGetCommand(ModBotTestCase):
+    """Test extracting commands from messages."""
+
+    @parameterized.expand(
+        [
+            ("!mute player 5m spam", "mute player 5m spam"),
+            ("ModBot: !mutelist", "mutelist"),
+            ("modbot: mutelist", "mutelist"),
+            ("MODBOT !mutelist", "mutelist"),
+            ("!kick player spam\nmore details", "kick player spam"),
+            ("ModBot: !mutelist\n", "mutelist"),
+            ("!", None),
+            ("ModBot:", None),
+            ("!\nmutelist", None),
+            ("mutelist", None),
+            ("Hello ModBot", None),
+        ]
+    )
+    def test_get_command(self, msg_body, expected_command):
+        """Test extracting commands with different prefixes."""
+        self.assertEqual(self.bot._get_command(msg_body), expected_command)
+
+
+class TestSetRoleInRooms(ModBotTestCase):
+    """Test setting the role of users in all MUC rooms."""
+
+    async def asyncSetUp(self):
+        """Set up ModBot with a user in two of three MUC rooms."""
+        await super().asyncSetUp()
+        self.rooms = [JID(f"room{i}@conference.lobby.tld") for i in range(3)]
+        self.bot.rooms = self.rooms
+        for room in self.rooms[:2]:
+            self.bot.room_nicks[str(room)]["player"] = "Player"
+
+    async def test_success(self):
+        """Test setting the role in all rooms the user is in."""
+        role_changes = await self.bot._set_role_in_rooms(
+            JID("player@lobby.tld"), "visitor", "spam"
+        )
+        self.assertEqual(
+            role_changes, [(self.rooms[0], "Player", None), (self.rooms[1], "Player", None)]
+        )
+        self.set_role_mock.assert_has_awaits(
+            [
+                call(self.rooms[0], "Player", "visitor", reason="spam"),
+                call(self.rooms[1], "Player", "visitor", reason="spam"),
+            ]
+        )
+
+    async def test_iq_error(self):
+        """Test reporting failed role changes per room."""
+        iq_error = IqError(self.bot.make_iq_error("1"))
+
+        async def set_role(room, *_, **__):
+            if room == self.rooms[1]:
+                raise iq_error
+
+        self.set_role_mock.side_effect = set_role
+        role_changes = await self.bot._set_role_in_rooms(JID("player@lobby.tld"), "visitor")
+        self.assertEqual(
+            role_changes,
+            [(self.rooms[0], "Player", None), (self.rooms[1], "Player", iq_error)],
+        )
+
+    async def test_other_error(self):
+        """Test raising errors other than IqError."""
+        self.set_role_mock.side_effect = RuntimeError
+        with self.assertRaises(RuntimeError):
+            await self.bot._set_role_in_rooms(JID("player@lobby.tld"), "visitor")
@@ -16,12 +16,17 @@
 
 """Tests for utility functions."""
 
+import ssl
 from contextlib import redirect_stderr
 from io import BytesIO, StringIO
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
-from xpartamupp.utils import ArgumentParserWithConfigFile
+from xpartamupp.utils import (
+    ArgumentParserWithConfigFile,
+    get_unverified_ssl_context,
+    install_uvloop,
+)
 
 
 class TestArgumentParserWithConfigFile(TestCase):
@@ -134,3 +139,73 @@ class TestArgumentParserWithConfigFile(TestCase):
         file_open_mock.assert_called_once_with(config_file_name, "rb")
         self.assertIs(namespace, parsed_args)
         self.assertEqual(2, parsed_args.verbosity)
+
+    def test_config_file_with_required_argument(self):
+        """Test config file in combination with a required argument."""
+        config_file_name = "config.toml"
+        args = ["--config-file", config_file_name, "foo"]
+
+        with patch("xpartamupp.utils.open") as file_open_mock:
+            file_open_mock.return_value = BytesIO(b"verbosity = 2\n")
+
+            parser = ArgumentParserWithConfigFile()
+            parser.add_argument("name")
+            parser.add_argument("-v", action="count", dest="verbosity", default=0)
+            parsed_args = parser.parse_args(args=args)
+
+        self.assertEqual("foo", parsed_args.name)
+        self.assertEqual(2, parsed_args.verbosity)
+
+    def test_config_file_with_shared_destination(self):
+        """Test config file with arguments sharing a destination."""
+        config_file_name = "config.toml"
+        args = ["--config-file", config_file_name]
+
+        with patch("xpartamupp.utils.open") as file_open_mock:
+            file_open_mock.return_value = BytesIO(b"verbosity = 2\n")
+
+            parser = ArgumentParserWithConfigFile()
+            verbosity_parser = parser.add_mutually_exclusive_group()
+            verbosity_parser.add_argument("-v", action="count", dest="verbosity", default=0)
+            verbosity_parser.add_argument("--verbosity", dest="verbosity", type=int)
+            parser.add_argument("--port", type=int, default="5222")
+            parsed_args = parser.parse_args(args=args)
+
+        self.assertEqual(2, parsed_args.verbosity)
+        self.assertEqual(5222, parsed_args.port)
+
+
+class TestGetUnverifiedSslContext(TestCase):
+    """Test the SSL context without certificate verification."""
+
+    def test_shared_context(self):
+        """Test that the same unverified context gets returned."""
+        ssl_context = get_unverified_ssl_context()
+        self.assertFalse(ssl_context.check_hostname)
+        self.assertEqual(ssl_context.verify_mode, ssl.CERT_NONE)
+        self.assertIs(get_unverified_ssl_context(), ssl_context)
+
+
+class TestInstallUvloop(TestCase):
+    """Test using uvloop as event loop if available."""
+
+    def test_uvloop_available(self):
+        """Test setting the event loop policy of uvloop."""
+        uvloop = Mock()
+        with (
+            patch.dict("sys.modules", {"uvloop": uvloop}),
+            patch("xpartamupp.utils.asyncio.set_event_loop_policy") as set_policy_mock,
+        ):
+            install_uvloop()
+
+        set_policy_mock.assert_called_once_with(uvloop.EventLoopPolicy.return_value)
+
+    def test_uvloop_missing(self):
+        """Test keeping the default event loop without uvloop."""
+        with (
+            patch.dict("sys.modules", {"uvloop": None}),
+            patch("xpartamupp.utils.asyncio.set_event_loop_policy") as set_policy_mock,
+        ):
+            install_uvloop()
+
+        set_policy_mock.assert_not_called()
@@ -16,18 +16,21 @@
 
 """Tests for XPartaMuPP."""
 
+import asyncio
 import sys
 from argparse import Namespace
 from unittest import TestCase
-from unittest.mock import Mock, call, patch
+from unittest.mock import call, patch
 
-from cachetools import FIFOCache
 from hypothesis import example, given
 from hypothesis import strategies as st
 from parameterized import parameterized
 from slixmpp.jid import JID
+from slixmpp.xmlstream import ET
 
-from xpartamupp.xpartamupp import Games, main, parse_args
+from tests.helpers import BotTestCase
+from xpartamupp.stanzas import GameListXmppPlugin
+from xpartamupp.xpartamupp import MAX_GAMES, Games, XpartaMuPP, main, parse_args
 
 
 class TestGames(TestCase):
@@ -52,7 +55,7 @@ class TestGames(TestCase):
                 "state": game_data["state"],
             }
         )
-        self.assertIsInstance(all_games, FIFOCache)
+        self.assertIsInstance(all_games, dict)
         self.assertDictEqual(dict(all_games), {jid: game_data})
 
     @parameterized.expand(
@@ -85,6 +88,93 @@ class TestGames(TestCase):
         self.assertEqual(len(all_games), 1)
         self.assertEqual(all_games["player1@domain.tld"]["name"], game_name[:256])
 
+    def test_add_too_many(self):
+        """Test dropping the oldest games when adding too many."""
+        games = Games()
+        jids = [JID(jid=f"player{i}@domain.tld") for i in range(MAX_GAMES + 2)]
+        game_data = {"players": "player", "name": "game", "nbp": "1", "state": "init"}
+        for jid in jids[:MAX_GAMES]:
+            self.assertTrue(games.add_game(jid, game_data))
+        self.assertTrue(games.add_game(jids[0], game_data))
+        self.assertEqual(len(games.get_all_games()), MAX_GAMES)
+
+        for jid in jids[MAX_GAMES:]:
+            self.assertTrue(games.add_game(jid, game_data))
+        self.assertEqual(
+            list(games.get_all_games()), [*jids[3:MAX_GAMES], jids[0], *jids[MAX_GAMES:]]
+        )
+
+    def test_add_too_many_started(self):
+        """Test dropping games which didn't start yet first."""
+        games = Games()
+        jids = [JID(jid=f"player{i}@domain.tld") for i in range(MAX_GAMES + 2)]
+        game_data = {"players": "player", "name": "game", "nbp": "1", "state": "init"}
+        for jid in jids[:MAX_GAMES]:
+            self.assertTrue(games.add_game(jid, game_data))
+        self.assertTrue(games.change_game_state(jids[0], game_data))
+        self.assertTrue(games.change_game_state(jids[2], game_data))
+
+        for jid in jids[MAX_GAMES:]:
+            self.assertTrue(games.add_game(jid, game_data))
+        self.assertEqual(
+            list(games.get_all_games()),
+            [jids[0], jids[2], *jids[4:]],
+        )
+
+        for jid in jids[4:]:
+            self.assertTrue(games.change_game_state(jid, game_data))
+        self.assertTrue(games.add_game(jids[1], game_data))
+        self.assertEqual(
+            list(games.get_all_games()),
+            [jids[2], *jids[4:], jids[1]],
+        )
+
+    def test_element(self):
+        """Test the cached XML element of a game."""
+        games = Games()
+        jid = JID(jid="player1@domain.tld/0ad")
+        game_data = {
+            "players": "player1, player2",
+            "name": "game",
+            "nbp": "2",
+            "nbp-init": "2",
+            "state": "init",
+            "ip": "192.0.2.1",
+        }
+        games.add_game(jid, game_data)
+        element = games.games[jid].to_element()
+        self.assertEqual(element.tag, "game")
+        self.assertEqual(element.get("nbp"), "2")
+        self.assertIsNone(element.get("ip"))
+        self.assertIs(games.games[jid].to_element(), element)
+
+        self.assertTrue(games.change_game_state(jid, {"nbp": "1", "players": "player1"}))
+        element = games.games[jid].to_element()
+        self.assertEqual(element.get("nbp"), "1")
+        self.assertEqual(element.get("state"), "waiting")
+
+    def test_contains(self):
+        """Test checking whether players host a game."""
+        games = Games()
+        jid = JID(jid="player1@domain.tld/0ad")
+        self.assertNotIn(jid, games)
+        games.add_game(jid, {"players": "player1", "name": "game", "nbp": "1"})
+        self.assertIn(jid, games)
+        games.remove_game(jid)
+        self.assertNotIn(jid, games)
+
+    def test_get_game_elements(self):
+        """Test getting the XML elements of the games of some hosts."""
+        games = Games()
+        jids = [JID(jid=f"player{i}@domain.tld/0ad") for i in range(3)]
+        for i, jid in enumerate(jids):
+            games.add_game(jid, {"players": f"player{i}", "name": f"game{i}", "nbp": "1"})
+        self.assertEqual(
+            [element.get("name") for element in games.get_game_elements({jids[2], jids[0]})],
+            ["game0", "game2"],
+        )
+        self.assertEqual(games.get_game_elements(set()), [])
+
     def test_remove(self):
         """Test removal of games."""
         games = Games()
@@ -118,7 +208,7 @@ class TestGames(TestCase):
                 "state": game_data2["state"],
             }
         )
-        self.assertIsInstance(games.get_all_games(), FIFOCache)
+        self.assertIsInstance(games.get_all_games(), dict)
         self.assertDictEqual(dict(games.get_all_games()), {jid1: game_data1, jid2: game_data2})
         games.remove_game(jid1)
         self.assertDictEqual(dict(games.get_all_games()), {jid2: game_data2})
@@ -139,165 +229,295 @@ class TestGames(TestCase):
         # structures aren't known
 
 
+class TestXpartaMuPP(BotTestCase):
+    """Test the game list handling of XpartaMuPP."""
+
+    async def asyncSetUp(self):
+        """Set up an XpartaMuPP instance which doesn't send anything."""
+        await super().asyncSetUp()
+        self.start_patch(patch.object(self.bot, "send"))
+        self.start_patch(patch("xpartamupp.xpartamupp.GAME_LIST_BROADCAST_DELAY_SECONDS", 0))
+
+    def create_bot(self):
+        """Create an XpartaMuPP instance."""
+        return XpartaMuPP(JID("xpartamupp@lobby.tld/CC"), "password", self.room, "WFGBot")
+
+    def register_game(self, jid, name):
+        """Register a game through the game list IQ handler.
+
+        Arguments:
+            jid (str): JID of the host of the game
+            name (str): name of the game
+
+        """
+        iq = self.bot.make_iq_set(ifrom=JID(jid))
+        iq["gamelist"]["command"] = "register"
+        iq["gamelist"].xml.append(
+            ET.Element(
+                f"{{{GameListXmppPlugin.namespace}}}game",
+                {"name": name, "players": "player", "nbp": "1"},
+            )
+        )
+        self.bot._iq_game_list_handler(iq)
+
+    def pop_sent_game_lists(self):
+        """Return and forget the game lists sent so far.
+
+        Returns:
+            list with the recipient and the names of the games of
+            each sent game list
+
+        """
+        game_lists = [
+            (stanza["to"], [game.get("name") for game in stanza["gamelist"].xml])
+            for (stanza,), _ in self.bot.send.call_args_list
+            if stanza["type"] == "result" and not stanza["gamelist"]["command"]
+        ]
+        self.bot.send.reset_mock()
+        return game_lists
+
+    async def test_online_jids(self):
+        """Test keeping track of online 0 A.D. clients."""
+        player1 = JID("player1@lobby.tld/0ad")
+        player2 = JID("player2@lobby.tld/0ad-1234")
+        self.bot._muc_online(self.make_presence("player1", player1))
+        self.bot._muc_online(self.make_presence("player2", player2))
+        self.bot._muc_online(self.make_presence("player3", "player3@lobby.tld/CC"))
+        self.assertEqual(self.bot.online_jids, {player1, player2})
+        self.assertEqual(self.pop_sent_game_lists(), [(player1, []), (player2, [])])
+
+        self.bot._muc_offline(self.make_presence("player1", player1, ptype="unavailable"))
+        self.assertEqual(self.bot.online_jids, {player2})
+
+    async def test_offline_host(self):
+        """Test removing the games of hosts going offline."""
+        host = JID("host@lobby.tld/0ad")
+        player = JID("player@lobby.tld/0ad")
+        self.bot._muc_online(self.make_presence("host", host))
+        self.bot._muc_online(self.make_presence("player", player))
+        self.register_game(host, "game")
+        await asyncio.sleep(0.01)
+        self.pop_sent_game_lists()
+
+        self.bot._muc_offline(self.make_presence("host", host, ptype="unavailable"))
+        self.assertNotIn(host, self.bot.games)
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.pop_sent_game_lists(), [(player, [])])
+
+    async def test_broadcast_coalescing(self):
+        """Test sending multiple changes with a single broadcast."""
+        host1 = JID("host1@lobby.tld/0ad")
+        host2 = JID("host2@lobby.tld/0ad")
+        self.bot._muc_online(self.make_presence("host1", host1))
+        self.bot._muc_online(self.make_presence("host2", host2))
+        self.pop_sent_game_lists()
+
+        self.register_game(host1, "game1")
+        broadcast = self.bot.game_list_broadcast
+        self.register_game(host2, "game2")
+        self.assertIs(self.bot.game_list_broadcast, broadcast)
+        self.assertEqual(self.pop_sent_game_lists(), [])
+
+        await asyncio.sleep(0.01)
+        self.assertIsNone(self.bot.game_list_broadcast)
+        self.assertCountEqual(
+            self.pop_sent_game_lists(),
+            [(host1, ["game1", "game2"]), (host2, ["game1", "game2"])],
+        )
+
+    async def test_skip_identical_broadcast(self):
+        """Test not broadcasting a game list which didn't change."""
+        player = JID("player@lobby.tld/0ad")
+        self.bot._muc_online(self.make_presence("player", player))
+        self.pop_sent_game_lists()
+        self.register_game(player, "game")
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.pop_sent_game_lists(), [(player, ["game"])])
+
+        # Games of hosts which aren't online don't show up in the list
+        self.register_game("offline@lobby.tld/0ad", "game")
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.pop_sent_game_lists(), [])
+
+        self.bot._send_game_list(player)
+        self.assertEqual(self.pop_sent_game_lists(), [(player, ["game"])])
+
+    async def test_reconnect_cancels_broadcast(self):
+        """Test cancelling a scheduled broadcast when reconnecting."""
+        player = JID("player@lobby.tld/0ad")
+        self.bot._muc_online(self.make_presence("player", player))
+        self.register_game(player, "game")
+        self.pop_sent_game_lists()
+
+        with patch.object(self.bot, "connect"):
+            await self.bot._reconnect(None)
+        self.assertIsNone(self.bot.game_list_broadcast)
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.pop_sent_game_lists(), [])
+
+
 class TestArgumentParsing(TestCase):
     """Test handling of parsing command line parameters."""
 
-    @parameterized.expand(
-        [
-            (
-                [],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="xpartamupp",
-                    verbosity=0,
-                    xserver=None,
-                    no_verify=False,
-                    nickname="WFGBot",
-                    password="XXXXXX",
-                    room="arena",
-                ),
+    VALID_CASES = (
+        (
+            [],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="xpartamupp",
+                verbosity=0,
+                xserver=None,
+                no_verify=False,
+                nickname="WFGBot",
+                password="XXXXXX",
+                room="arena",
             ),
-            (
-                ["-v"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="xpartamupp",
-                    verbosity=1,
-                    xserver=None,
-                    no_verify=False,
-                    nickname="WFGBot",
-                    password="XXXXXX",
-                    room="arena",
-                ),
+        ),
+        (
+            ["-v"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="xpartamupp",
+                verbosity=1,
+                xserver=None,
+                no_verify=False,
+                nickname="WFGBot",
+                password="XXXXXX",
+                room="arena",
             ),
-            (
-                ["-vv"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="xpartamupp",
-                    verbosity=2,
-                    xserver=None,
-                    no_verify=False,
-                    nickname="WFGBot",
-                    password="XXXXXX",
-                    room="arena",
-                ),
+        ),
+        (
+            ["-vv"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="xpartamupp",
+                verbosity=2,
+                xserver=None,
+                no_verify=False,
+                nickname="WFGBot",
+                password="XXXXXX",
+                room="arena",
             ),
-            (
-                ["-vvv"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="xpartamupp",
-                    verbosity=3,
-                    xserver=None,
-                    no_verify=False,
-                    nickname="WFGBot",
-                    password="XXXXXX",
-                    room="arena",
-                ),
+        ),
+        (
+            ["-vvv"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="xpartamupp",
+                verbosity=3,
+                xserver=None,
+                no_verify=False,
+                nickname="WFGBot",
+                password="XXXXXX",
+                room="arena",
             ),
-            (
-                ["--verbosity", "3"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="xpartamupp",
-                    verbosity=3,
-                    xserver=None,
-                    no_verify=False,
-                    nickname="WFGBot",
-                    password="XXXXXX",
-                    room="arena",
-                ),
+        ),
+        (
+            ["--verbosity", "3"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="xpartamupp",
+                verbosity=3,
+                xserver=None,
+                no_verify=False,
+                nickname="WFGBot",
+                password="XXXXXX",
+                room="arena",
             ),
-            (
-                ["-m", "lobby.domain.tld"],
-                Namespace(
-                    domain="lobby.domain.tld",
-                    login="xpartamupp",
-                    verbosity=0,
-                    nickname="WFGBot",
-                    xserver=None,
-                    no_verify=False,
-                    password="XXXXXX",
-                    room="arena",
-                ),
+        ),
+        (
+            ["-m", "lobby.domain.tld"],
+            Namespace(
+                domain="lobby.domain.tld",
+                login="xpartamupp",
+                verbosity=0,
+                nickname="WFGBot",
+                xserver=None,
+                no_verify=False,
+                password="XXXXXX",
+                room="arena",
             ),
-            (
-                ["--domain=lobby.domain.tld"],
-                Namespace(
-                    domain="lobby.domain.tld",
-                    login="xpartamupp",
-                    verbosity=0,
-                    nickname="WFGBot",
-                    xserver=None,
-                    no_verify=False,
-                    password="XXXXXX",
-                    room="arena",
-                ),
+        ),
+        (
+            ["--domain=lobby.domain.tld"],
+            Namespace(
+                domain="lobby.domain.tld",
+                login="xpartamupp",
+                verbosity=0,
+                nickname="WFGBot",
+                xserver=None,
+                no_verify=False,
+                password="XXXXXX",
+                room="arena",
             ),
-            (
-                [
-                    "-m",
-                    "lobby.domain.tld",
-                    "-l",
-                    "bot",
-                    "-p",
-                    "123456",
-                    "-n",
-                    "Bot",
-                    "-r",
-                    "arena123",
-                    "-v",
-                ],
-                Namespace(
-                    domain="lobby.domain.tld",
-                    login="bot",
-                    verbosity=1,
-                    xserver=None,
-                    no_verify=False,
-                    nickname="Bot",
-                    password="123456",
-                    room="arena123",
-                ),
+        ),
+        (
+            [
+                "-m",
+                "lobby.domain.tld",
+                "-l",
+                "bot",
+                "-p",
+                "123456",
+                "-n",
+                "Bot",
+                "-r",
+                "arena123",
+                "-v",
+            ],
+            Namespace(
+                domain="lobby.domain.tld",
+                login="bot",
+                verbosity=1,
+                xserver=None,
+                no_verify=False,
+                nickname="Bot",
+                password="123456",
+                room="arena123",
             ),
-            (
-                [
-                    "--domain=lobby.domain.tld",
-                    "--login=bot",
-                    "--password=123456",
-                    "--nickname=Bot",
-                    "--room=arena123",
-                ],
-                Namespace(
-                    domain="lobby.domain.tld",
-                    login="bot",
-                    verbosity=0,
-                    xserver=None,
-                    no_verify=False,
-                    nickname="Bot",
-                    password="123456",
-                    room="arena123",
-                ),
+        ),
+        (
+            [
+                "--domain=lobby.domain.tld",
+                "--login=bot",
+                "--password=123456",
+                "--nickname=Bot",
+                "--room=arena123",
+            ],
+            Namespace(
+                domain="lobby.domain.tld",
+                login="bot",
+                verbosity=0,
+                xserver=None,
+                no_verify=False,
+                nickname="Bot",
+                password="123456",
+                room="arena123",
             ),
-            (
-                ["--no-verify"],
-                Namespace(
-                    domain="lobby.wildfiregames.com",
-                    login="xpartamupp",
-                    verbosity=0,
-                    xserver=None,
-                    no_verify=True,
-                    nickname="WFGBot",
-                    password="XXXXXX",
-                    room="arena",
-                ),
+        ),
+        (
+            ["--no-verify"],
+            Namespace(
+                domain="lobby.wildfiregames.com",
+                login="xpartamupp",
+                verbosity=0,
+                xserver=None,
+                no_verify=True,
+                nickname="WFGBot",
+                password="XXXXXX",
+                room="arena",
             ),
-        ]
+        ),
     )
-    def test_valid(self, cmd_args, expected_args):
+
+    def test_valid(self):
         """Test valid parameter combinations."""
-        with patch.object(sys, "argv", ["xpartamupp", *cmd_args]):
-            self.assertEqual(parse_args(), expected_args)
+        for cmd_args, expected_args in self.VALID_CASES:
+            with (
+                self.subTest(cmd_args=cmd_args),
+                patch.object(sys, "argv", ["xpartamupp", *cmd_args]),
+            ):
+                self.assertEqual(parse_args(), expected_args)
 
     @parameterized.expand([(["-f"],), (["--foo"],), (["-v", "--verbosity", "1"],)])
     def test_invalid(self, cmd_args):
@@ -309,6 +529,18 @@ class TestArgumentParsing(TestCase):
 class TestMain(TestCase):
     """Test main method."""
 
+    DEFAULT_ARGS = Namespace(
+        log_level=30,
+        login="xpartamupp",
+        domain="lobby.wildfiregames.com",
+        password="XXXXXX",
+        room="arena",
+        nickname="WFGBot",
+        xserver=None,
+        no_verify=False,
+        verbosity=0,
+    )
+
     def test_success(self):
         """Test successful execution."""
         with (
@@ -316,17 +548,7 @@ class TestMain(TestCase):
             patch("xpartamupp.xpartamupp.XpartaMuPP") as xmpp_mock,
             patch("xpartamupp.xpartamupp.asyncio") as asyncio_mock,
         ):
-            args_mock.return_value = Mock(
-                log_level=30,
-                login="xpartamupp",
-                domain="lobby.wildfiregames.com",
-                password="XXXXXX",
-                room="arena",
-                nickname="WFGBot",
-                xserver=None,
-                no_verify=False,
-                verbosity=0,
-            )
+            args_mock.return_value = self.DEFAULT_ARGS
             main()
             args_mock.assert_called_once_with()
             xmpp_mock().register_plugin.assert_has_calls(
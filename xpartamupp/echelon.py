@@ -21,11 +21,11 @@
 import asyncio
 import difflib
 import logging
-import ssl
+import random
+import time
 from argparse import ArgumentDefaultsHelpFormatter
 from asyncio import Future
 from collections import deque
-from datetime import UTC, datetime, timedelta
 
 from cachetools import TTLCache
 from slixmpp import ClientXMPP
@@ -41,7 +41,12 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from xpartamupp.elo import get_rating_adjustment
 from xpartamupp.lobby_ranking import Game, Player, PlayerInfo
 from xpartamupp.stanzas import BoardListXmppPlugin, GameReportXmppPlugin, ProfileXmppPlugin
-from xpartamupp.utils import ArgumentParserWithConfigFile
+from xpartamupp.utils import (
+    MAX_RECONNECT_DELAY_SECONDS,
+    ArgumentParserWithConfigFile,
+    get_unverified_ssl_context,
+    install_uvloop,
+)
 
 
 # Rating that new players should be inserted into the
@@ -587,8 +592,7 @@ class EcheLOn(ClientXMPP):
         super().__init__(sjid, password)
 
         if not verify_certificate:
-            self.ssl_context.check_hostname = False
-            self.ssl_context.verify_mode = ssl.CERT_NONE
+            self.ssl_context = get_unverified_ssl_context()
 
         self.whitespace_keepalive = False
 
@@ -660,19 +664,23 @@ class EcheLOn(ClientXMPP):
     async def _reconnect(self, _event):
         """Trigger a reconnection attempt.
 
-        This triggers a reconnection attempt and implements the same
-        back-off behavior as the ClientXMPP.connect() method does to
-        avoid too frequent reconnection tries.
+        This triggers a reconnection attempt and implements an
+        exponential back-off with random jitter to avoid too frequent
+        reconnection tries and multiple clients reconnecting at the
+        same time.
 
         Arguments:
             _event (dict): empty dummy dict
 
         """
         if self._connect_loop_wait_reconnect > 0:
-            self.event("reconnect_delay", self._connect_loop_wait_reconnect)
-            await asyncio.sleep(self._connect_loop_wait_reconnect)
+            delay = random.uniform(0, self._connect_loop_wait_reconnect)  # noqa: S311
+            self.event("reconnect_delay", delay)
+            await asyncio.sleep(delay)
 
-        self._connect_loop_wait_reconnect = self._connect_loop_wait_reconnect * 2 + 1
+        self._connect_loop_wait_reconnect = min(
+            self._connect_loop_wait_reconnect * 2 + 1, MAX_RECONNECT_DELAY_SECONDS
+        )
 
         self.connect()
 
@@ -685,7 +693,7 @@ class EcheLOn(ClientXMPP):
 
         """
         nick = str(presence["muc"]["nick"])
-        jid = JID(presence["muc"]["jid"])
+        jid = presence["muc"]["jid"]
 
         if not jid.resource.startswith("0ad"):
             return
@@ -707,7 +715,7 @@ class EcheLOn(ClientXMPP):
 
         """
         nick = str(presence["muc"]["nick"])
-        jid = JID(presence["muc"]["jid"])
+        jid = presence["muc"]["jid"]
 
         if not jid.resource.startswith("0ad"):
             return
@@ -732,12 +740,11 @@ class EcheLOn(ClientXMPP):
         if msg["mucnick"] == self.nick or self.nick.lower() not in msg["body"].lower():
             return
 
-        if self.last_info_msg and self.last_info_msg + timedelta(
-            seconds=INFO_MSG_COOLDOWN_SECONDS
-        ) > datetime.now(tz=UTC):
+        now = time.monotonic()
+        if self.last_info_msg and now - self.last_info_msg < INFO_MSG_COOLDOWN_SECONDS:
             return
 
-        self.last_info_msg = datetime.now(tz=UTC)
+        self.last_info_msg = now
         self.send_message(
             mto=msg["from"].bare,
             mbody="I am just a bot and provide the rating functionality for this "
@@ -978,6 +985,8 @@ def main():
     )
     logger.setLevel(log_level)
 
+    install_uvloop()
+
     leaderboard = Leaderboard(args.database_url)
     xmpp = EcheLOn(
         JID(f"{args.login}@{args.domain}/CC"),
@@ -27,6 +27,7 @@ from sqlalchemy import (
     JSON,
     DateTime,
     ForeignKey,
+    Index,
     String,
     TypeDecorator,
     UnicodeText,
@@ -74,6 +75,7 @@ class ProfanityTerms(Base):
     """Model for profanity terms."""
 
     __tablename__ = "profanity_terms"
+    __table_args__: ClassVar[dict[str, Any]] = {"sqlite_with_rowid": False}
 
     term: Mapped[str] = mapped_column(String(255), primary_key=True)
     language: Mapped[str] = mapped_column(String(2), primary_key=True)
@@ -86,7 +88,7 @@ class ProfanityIncident(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     timestamp: Mapped[datetime] = mapped_column(default=partial(datetime.now, tz=UTC))
-    player: Mapped[str] = mapped_column(String(255))
+    player: Mapped[str] = mapped_column(String(255), index=True)
     room: Mapped[str] = mapped_column(String(255))
     offending_content: Mapped[str] = mapped_column(UnicodeText)
     detected_languages: Mapped[list[str]] = mapped_column(JSON)
@@ -97,6 +99,7 @@ class JIDNickWhitelist(Base):
     """Model for JIDs which are permitted to change their nick."""
 
     __tablename__ = "jid_nick_whitelist"
+    __table_args__: ClassVar[dict[str, Any]] = {"sqlite_with_rowid": False}
 
     jid: Mapped[str] = mapped_column(String(255), primary_key=True)
 
@@ -121,7 +124,7 @@ class ModerationEvent(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     event_date: Mapped[datetime] = mapped_column(default=partial(datetime.now, tz=UTC))
     event_type: Mapped[EventType]
-    moderator: Mapped[str] = mapped_column(String(255), ForeignKey("moderators.jid"))
+    moderator: Mapped[str] = mapped_column(String(255), ForeignKey("moderators.jid"), index=True)
     player: Mapped[str] = mapped_column(String(255))
     reason: Mapped[str] = mapped_column(UnicodeText)
 
@@ -192,6 +195,14 @@ class MuteEvent(ModerationEvent):
     }
 
 
+# As mute events use single table inheritance, the index for looking up
+# mutes by their end has to be declared outside of the class. To keep
+# the indexes of moderation events in one place, the index for looking
+# up the events of a player is declared here as well.
+Index("ix_modevent_player_date", ModerationEvent.player, ModerationEvent.event_date)
+Index("ix_mute_player_muteend", MuteEvent.player, MuteEvent.mute_end)
+
+
 class UnmuteEvent(ModerationEvent):
     """Model for an unmute event."""
 
@@ -212,6 +223,7 @@ class Moderator(Base):
     """Model for storing the JIDs of lobby moderators."""
 
     __tablename__ = "moderators"
+    __table_args__: ClassVar[dict[str, Any]] = {"sqlite_with_rowid": False}
 
     jid: Mapped[str] = mapped_column(String(255), primary_key=True)
 
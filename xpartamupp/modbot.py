@@ -19,10 +19,10 @@
 
 import asyncio
 import logging
+import random
 import re
-import shlex
-import ssl
 import string
+import time
 from argparse import (
     ONE_OR_MORE,
     PARSER,
@@ -36,10 +36,14 @@ from argparse import (
     _MutuallyExclusiveGroup,
 )
 from asyncio import CancelledError, Future, Task
-from collections.abc import Iterable, Sequence
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
+from functools import cache, lru_cache
+from typing import TypeVar
 
-import dateparser
+from dateparser import DateDataParser
 from simplemma import LanguageDetector, Lemmatizer, simple_tokenizer
 from simplemma.strategies import DefaultStrategy
 from simplemma.strategies.dictionaries import TrieDictionaryFactory
@@ -47,9 +51,10 @@ from slixmpp import ClientXMPP, Message
 from slixmpp.exceptions import IqError
 from slixmpp.jid import JID
 from slixmpp.plugins.xep_0045 import MUCPresence
-from sqlalchemy import create_engine, func, select, text
+from sqlalchemy import Row, create_engine, event, select
 from sqlalchemy.dialects.sqlite.base import SQLiteDialect
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.orm import sessionmaker
 
 from xpartamupp.lobby_moderation_db import (
     JIDNickWhitelist,
@@ -60,15 +65,41 @@ from xpartamupp.lobby_moderation_db import (
     ProfanityTerms,
     UnmuteEvent,
 )
-from xpartamupp.utils import ArgumentParserWithConfigFile
+from xpartamupp.utils import (
+    MAX_RECONNECT_DELAY_SECONDS,
+    ArgumentParserWithConfigFile,
+    get_unverified_ssl_context,
+    install_uvloop,
+)
 
 
 # Number of seconds to not respond to mentions after having responded
 # to a mention.
 INFO_MSG_COOLDOWN_SECONDS = 15 * 60
 
+# Number of seconds after which data, which is cached in memory, gets
+# reloaded from the database.
+DB_CACHE_REFRESH_SECONDS = 5 * 60
+# Minimum number of seconds between reloading cached data from the
+# database because of a lookup which didn't find a match, so users
+# can't cause lots of database queries.
+DB_CACHE_MISS_RELOAD_SECONDS = 10
+# Time profanity incidents get buffered for before writing them to the
+# database, so bursts of them get written in a single transaction.
+PROFANITY_INCIDENT_FLUSH_SECONDS = 2
+# Maximum number of seconds to wait before retrying to write profanity
+# incidents to the database. The delay between retries doubles after
+# each failure until it reaches this limit.
+PROFANITY_INCIDENT_MAX_RETRY_SECONDS = 5 * 60
+# Maximum number of profanity incidents to keep buffered while writing
+# them to the database fails. If there are more, the oldest ones get
+# dropped.
+MAX_BUFFERED_PROFANITY_INCIDENTS = 1000
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 PROFANITY_SUPPORTED_LANGUAGES = {
     "de": "German",
     "en": "English",
@@ -78,10 +109,50 @@ PROFANITY_SUPPORTED_LANGUAGES = {
     "ru": "Russian",
     "tr": "Turkish",
 }
+# Codes of the supported languages, keyed by their lowercase names
+PROFANITY_SUPPORTED_LANGUAGE_CODES = {
+    name.lower(): code for code, name in PROFANITY_SUPPORTED_LANGUAGES.items()
+}
 PROFANITY_MUTE_WINDOW_MINUTES = 60 * 24 * 31 * 3
 PROFANITY_MUTE_THRESHOLD = 3
 PROFANITY_MAX_MUTE_DURATION_MINUTES = 60 * 24 * 7
 
+# Maximum duration users can be muted for. This is slightly more than
+# five years to account for leap days.
+MAX_MUTE_DURATION = timedelta(days=5 * 366)
+
+# Time units supported by parse_duration() and the keyword arguments
+# of timedelta they correspond to.
+DURATION_UNITS = {
+    **dict.fromkeys(("s", "sec", "secs", "second", "seconds"), "seconds"),
+    **dict.fromkeys(("m", "min", "mins", "minute", "minutes"), "minutes"),
+    **dict.fromkeys(("h", "hr", "hrs", "hour", "hours"), "hours"),
+    **dict.fromkeys(("d", "day", "days"), "days"),
+    **dict.fromkeys(("w", "week", "weeks"), "weeks"),
+}
+
+# Tokens to ignore when checking messages for profanity
+PUNCTUATION_CHARACTERS = frozenset(string.punctuation)
+
+# Regex matching the tokens of commands, as used by split_command().
+# Only the characters in shlex.whitespace separate tokens.
+COMMAND_TOKEN_REGEX = re.compile(
+    r"(?P<space>[ \t\r\n]+)"
+    r"|'(?P<single_quoted>[^']*)'"
+    r'|"(?P<double_quoted>(?:[^"\\]|\\.)*)"'
+    r"|\\(?P<escaped>.)"
+    r"|(?P<unquoted>[^ \t\r\n'\"\\]+)"
+    r"|(?P<invalid>.)",
+    re.DOTALL,
+)
+DOUBLE_QUOTED_ESCAPE_REGEX = re.compile(r'\\(["\\])')
+
+DATEPARSER_SETTINGS = {
+    "TIMEZONE": "UTC",
+    "RETURN_AS_TIMEZONE_AWARE": True,
+    "PREFER_DATES_FROM": "future",
+}
+
 
 class ModCmdParser(ArgumentParser):
     """Custom argument parser for commands via XMPP."""
@@ -182,10 +253,13 @@ class ModBotSubparserArgumentFormatter(HelpFormatter):
         return super()._format_args(action, default_metavar)
 
 
+@cache
 def get_cmd_parser() -> ArgumentParser:
     """Return an instance of the moderation command parser.
 
-    This parser is used to parse commands submitted via XMPP.
+    This parser is used to parse commands submitted via XMPP. As
+    parsing commands doesn't change the parser, the same instance is
+    returned for all calls.
     """
     cmd_parser = ModCmdParser(
         add_help=False, allow_abbrev=False, formatter_class=ModBotArgumentsFormatter, prog=""
@@ -239,6 +313,131 @@ def get_cmd_parser() -> ArgumentParser:
     return cmd_parser
 
 
+@lru_cache(maxsize=256)
+def parse_duration(duration: str) -> timedelta | None:
+    """Parse a duration consisting of numbers followed by time units.
+
+    This handles durations like "5m", "1h30m" or "2 days 12 hours" in
+    a single pass over the string, without having to resort to a
+    generic date parser. Supported are the units listed in
+    DURATION_UNITS. As the same few durations get used over and over
+    again, results are cached.
+
+    Arguments:
+        duration (str): duration to parse
+
+    Returns:
+        The parsed duration or None if the duration contains anything
+        not supported by this parser.
+
+    """
+    duration = duration.lower()
+    length = len(duration)
+    position = 0
+    result = None
+
+    while position < length:
+        if duration[position].isspace():
+            position += 1
+            continue
+
+        start = position
+        while position < length and "0" <= duration[position] <= "9":
+            position += 1
+        if start == position:
+            return None
+        try:
+            number = int(duration[start:position])
+        except ValueError:
+            # Numbers too long to convert can't be valid durations.
+            return None
+
+        while position < length and duration[position].isspace():
+            position += 1
+
+        start = position
+        while position < length and duration[position].isalpha():
+            position += 1
+        unit = DURATION_UNITS.get(duration[start:position])
+        if not unit:
+            return None
+
+        try:
+            result = (result or timedelta()) + timedelta(**{unit: number})
+        except OverflowError:
+            return None
+
+    return result
+
+
+def split_command(command: str) -> list[str]:
+    """Split a command into its arguments.
+
+    Arguments are separated by whitespace. Single and double quotes
+    can be used to include whitespace in an argument and backslashes
+    to escape single characters, with the same semantics as
+    shlex.split() has in POSIX mode.
+
+    Arguments:
+        command (str): command to split
+
+    Returns:
+        list with the arguments of the command
+
+    Raises:
+        ValueError: if the command contains unbalanced quotes or ends
+                    with an unescaped backslash
+
+    """
+    args = []
+    current = None
+
+    for match in COMMAND_TOKEN_REGEX.finditer(command):
+        kind = match.lastgroup
+        value = match[kind]
+
+        if kind == "space":
+            if current is not None:
+                args.append(current)
+                current = None
+            continue
+        if kind == "invalid":
+            raise ValueError("No escaped character" if value == "\\" else "No closing quotation")
+        if kind == "double_quoted":
+            value = DOUBLE_QUOTED_ESCAPE_REGEX.sub(r"\1", value)
+
+        current = (current or "") + value
+
+    if current is not None:
+        args.append(current)
+    return args
+
+
+def set_sqlite_pragmas(dbapi_connection: DBAPIConnection, _) -> None:
+    """Configure new SQLite connections.
+
+    Besides setting a busy timeout, this enables the write-ahead log
+    with relaxed syncing, so commits don't have to wait for an fsync
+    and reads don't block writes. It also increases the memory
+    SQLite may use for caching.
+
+    Arguments:
+        dbapi_connection (DBAPIConnection): the new connection
+
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma in (
+        "busy_timeout=10000",
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "temp_store=MEMORY",
+        "mmap_size=268435456",
+        "cache_size=-20000",
+    ):
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
 def coroutine_exception_handler(task: Task) -> None:
     """Log asyncio task exceptions."""
     if task.exception():
@@ -285,21 +484,26 @@ class ModBot(ClientXMPP):
 
         engine = create_engine(db_url)
 
-        session_factory = sessionmaker(bind=engine)
-        self.db_session = scoped_session(session_factory)
+        self.db_session = sessionmaker(bind=engine)
 
         if isinstance(engine.dialect, SQLiteDialect):
-            self.db_session.execute(text("PRAGMA busy_timeout=10000"))
+            event.listen(engine, "connect", set_sqlite_pragmas)
+
+        # Database transactions of moderation actions are run in a
+        # separate thread to not block the event loop while waiting
+        # for the database. A single thread is used to keep them
+        # serialized.
+        self.db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="modbot-db")
 
         if not verify_certificate:
-            self.ssl_context.check_hostname = False
-            self.ssl_context.verify_mode = ssl.CERT_NONE
+            self.ssl_context = get_unverified_ssl_context()
 
         self.whitespace_keepalive = False
 
         self.shutdown = Future()
         self._connect_loop_wait_reconnect = 0
 
+        self.enable_profanity_monitoring = enable_profanity_monitoring
         if enable_profanity_monitoring:
             supported_languages = tuple(lang for lang in PROFANITY_SUPPORTED_LANGUAGES)
             lemmatization_strategy = DefaultStrategy(dictionary_factory=TrieDictionaryFactory())
@@ -311,9 +515,37 @@ class ModBot(ClientXMPP):
         self.rooms = rooms
         self.command_room = command_room
         self.nick = nick
-
-        self.unmute_tasks: dict[JID, asyncio.Task] = {}
+        self.nick_lower = nick.lower()
+
+        self.unmute_tasks: dict[str, asyncio.Task] = {}
+        # End and reason of the active mutes, keyed by the bare JID of
+        # the muted player
+        self.active_mutes: dict[str, tuple[datetime, str]] = {}
+        self.db_cache_refresh_task: asyncio.Task | None = None
+        self.profanity_terms: dict[str, frozenset[str]] = {}
+        self.profanity_regexes: dict[tuple[str, ...], re.Pattern | None] = {}
+        # Timestamps of the profanity incidents of each player within
+        # the profanity mute window, oldest first
+        self.recent_profanity_incidents: dict[str, deque[datetime]] = defaultdict(deque)
+        self.profanity_incident_buffer: list[ProfanityIncident] = []
+        self.profanity_incident_flush_task: asyncio.Task | None = None
+        self.profanity_incident_write_failures = 0
+        # Monotonic time of the last reload of each cache because of a
+        # cache miss
+        self.cache_miss_reloads: dict[str, float] = {}
+        self.jid_nick_whitelist: frozenset[str] = frozenset()
+        # Nicks of the users in each MUC room, keyed by their lower
+        # case version
+        self.room_nicks: dict[str, dict[str, str]] = defaultdict(dict)
         self.cmd_parser = get_cmd_parser()
+        self.cmd_handlers: dict[str, Callable[[Namespace, JID], Awaitable[None]]] = {
+            "mute": self._cmd_mute,
+            "mutelist": self._cmd_mutelist,
+            "unmute": self._cmd_unmute,
+            "kick": self._cmd_kick,
+            "profanitylist": self._cmd_profanitylist,
+        }
+        self.date_parser = DateDataParser(languages=["en"], settings=DATEPARSER_SETTINGS)
 
         self.last_info_msg = None
 
@@ -336,99 +568,299 @@ class ModBot(ClientXMPP):
         muted.
         """
         self._connect_loop_wait_reconnect = 0
+
+        await self._load_db_caches()
+        if self.db_cache_refresh_task:
+            self.db_cache_refresh_task.cancel()
+        self.db_cache_refresh_task = create_task(self._refresh_db_caches())
+
+        # Active mutes have to be known before joining the MUC rooms,
+        # as they are needed for setting the roles of present users.
+        self.active_mutes = await self._db_run(self._get_active_mutes)
+
         for room in self.rooms:
             await self.plugin["xep_0045"].join_muc_wait(room, self.nick)
         await self.plugin["xep_0045"].join_muc_wait(self.command_room, self.nick)
         self.send_presence()
         self.get_roster()
 
-        with self.db_session() as db:
-            for mute in db.execute(
-                select(MuteEvent).filter_by(is_active=True).order_by(MuteEvent.mute_end)
-            ).scalars():
-                task = create_task(self._unmute_after_mute_ended(mute.mute_end, JID(mute.player)))
-                self.unmute_tasks[mute.player] = task
+        # While profanity incidents are still buffered, the database
+        # lacks them, but the incidents kept in memory are up to date.
+        if self.enable_profanity_monitoring and not self.profanity_incident_flush_task:
+            self.recent_profanity_incidents = await self._db_run(
+                self._get_recent_profanity_incidents
+            )
+
+        self.unmute_tasks.update(
+            {
+                player: create_task(self._unmute_after_mute_ended(mute_end, JID(player)))
+                for player, (mute_end, _) in self.active_mutes.items()
+            }
+        )
 
         logger.info("ModBot started")
 
+    async def _db_run(self, func: Callable[..., T], *args) -> T:
+        """Run a function accessing the database in the database thread.
+
+        Arguments:
+            func (Callable): function to run. It mustn't return ORM
+                             objects, as their session isn't usable
+                             outside the database thread.
+            args: positional arguments to pass to the function
+
+        Returns:
+            The return value of the function
+
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.db_executor, func, *args)
+
+    def _get_active_mutes(self) -> dict[str, tuple[datetime, str]]:
+        """Get the active mutes from the database.
+
+        Returns:
+            dict with the end and reason of the latest active mute of
+            each muted player
+
+        """
+        # As the mutes are ordered by their end, only the latest mute
+        # of each player is kept.
+        with self.db_session() as db:
+            return {
+                player: (mute_end, reason)
+                for player, mute_end, reason in db.execute(
+                    select(MuteEvent.player, MuteEvent.mute_end, MuteEvent.reason)
+                    .filter_by(is_active=True)
+                    .order_by(MuteEvent.mute_end)
+                )
+            }
+
+    def _get_recent_profanity_incidents(self) -> dict[str, deque[datetime]]:
+        """Get the profanity incidents within the profanity mute window.
+
+        Returns:
+            dict with the timestamps of the recent profanity incidents
+            of each player, oldest first
+
+        """
+        window_start = datetime.now(tz=UTC) - timedelta(minutes=PROFANITY_MUTE_WINDOW_MINUTES)
+        recent_incidents = defaultdict(deque)
+        with self.db_session() as db:
+            for player, timestamp in db.execute(
+                select(ProfanityIncident.player, ProfanityIncident.timestamp)
+                .filter(ProfanityIncident.timestamp >= window_start)
+                .order_by(ProfanityIncident.timestamp)
+            ):
+                recent_incidents[player].append(timestamp)
+        return recent_incidents
+
+    def _get_profanity_terms(self) -> dict[str, frozenset[str]]:
+        """Get the profanity terms from the database.
+
+        Returns:
+            dict with the profanity terms of each language
+
+        """
+        profanity_terms = defaultdict(set)
+        with self.db_session() as db:
+            for term, language in db.execute(select(ProfanityTerms.term, ProfanityTerms.language)):
+                profanity_terms[language].add(term)
+        return {language: frozenset(terms) for language, terms in profanity_terms.items()}
+
+    def _get_jid_nick_whitelist(self) -> frozenset[str]:
+        """Get the JIDs allowed to use a nick different from their JID.
+
+        Returns:
+            frozenset with the bare JIDs of all whitelisted users
+
+        """
+        with self.db_session() as db:
+            return frozenset(db.scalars(select(JIDNickWhitelist.jid)))
+
+    async def _load_db_caches(self) -> None:
+        """Load rarely changing data from the database into memory."""
+        profanity_terms = await self._db_run(self._get_profanity_terms)
+        self.jid_nick_whitelist = await self._db_run(self._get_jid_nick_whitelist)
+        if profanity_terms != self.profanity_terms:
+            self.profanity_terms = profanity_terms
+            self.profanity_regexes = {}
+
+    def _get_profanity_regex(self, languages: tuple[str, ...]) -> re.Pattern | None:
+        """Get the regex matching profanity terms of some languages.
+
+        The regexes get compiled on first use and are cached until the
+        profanity terms change.
+
+        Arguments:
+            languages (tuple): languages to match the profanity terms
+                               of
+
+        Returns:
+            Compiled regex matching the profanity terms as separate
+            words in a string of space-separated lemmas or None, if
+            there aren't any profanity terms for the given languages.
+
+        """
+        try:
+            return self.profanity_regexes[languages]
+        except KeyError:
+            pass
+
+        profanity_terms = frozenset().union(
+            *(self.profanity_terms.get(language, frozenset()) for language in languages)
+        )
+        regex = None
+        if profanity_terms:
+            regex = re.compile(r"(?:^|(?<= ))(" + "|".join(profanity_terms) + r")(?= |$)")
+        self.profanity_regexes[languages] = regex
+        return regex
+
+    async def _is_moderator(self, jid: str) -> bool:
+        """Check whether a user is a moderator.
+
+        This always checks the database, so moderators which got
+        removed lose their privileges immediately. As only moderators
+        use commands, this happens rarely.
+
+        Arguments:
+            jid (str): bare JID of the user to check
+
+        Returns:
+            True if the user is a moderator, False otherwise
+
+        """
+
+        def is_moderator() -> bool:
+            with self.db_session() as db:
+                return db.get(Moderator, jid) is not None
+
+        return await self._db_run(is_moderator)
+
+    def _may_reload_cache(self, cache: str) -> bool:
+        """Check whether a cache may get reloaded after a cache miss.
+
+        Reloads because of cache misses are limited to one every
+        DB_CACHE_MISS_RELOAD_SECONDS per cache.
+
+        Arguments:
+            cache (str): name of the cache to reload
+
+        Returns:
+            True if the cache may get reloaded, False otherwise
+
+        """
+        now = time.monotonic()
+        last_reload = self.cache_miss_reloads.get(cache)
+        if last_reload is not None and now - last_reload < DB_CACHE_MISS_RELOAD_SECONDS:
+            return False
+        self.cache_miss_reloads[cache] = now
+        return True
+
+    async def _refresh_db_caches(self) -> None:
+        """Periodically reload data cached from the database.
+
+        This ensures changes done directly in the database get picked
+        up without having to restart ModBot.
+        """
+        while True:
+            try:
+                await asyncio.sleep(DB_CACHE_REFRESH_SECONDS)
+            except CancelledError:
+                return
+
+            try:
+                await self._load_db_caches()
+            except Exception:
+                logger.exception("Reloading data cached from the database failed.")
+
     async def _shutdown(self, _) -> None:
         """Shut down ModBot.
 
         This is used for aborting connection tries in case the
         configured credentials are wrong, as further connection tries
-        won't succeed in this case.
+        won't succeed in this case. Buffered profanity incidents get
+        written to the database before.
         """
         logger.error("Can't log in. Aborting reconnects.")
+
+        if self.profanity_incident_flush_task:
+            self.profanity_incident_flush_task.cancel()
+            self.profanity_incident_flush_task = None
+        await self._write_profanity_incidents()
+
         self.abort()
         self.shutdown.set_result(True)
 
     async def _reconnect(self, _) -> None:
         """Trigger a reconnection attempt.
 
-        This triggers a reconnection attempt and implements the same
-        back-off behavior as the ClientXMPP.connect() method does to
-        avoid too frequent reconnection tries.
+        This triggers a reconnection attempt and implements an
+        exponential back-off with random jitter to avoid too frequent
+        reconnection tries and multiple clients reconnecting at the
+        same time.
 
         To avoid trying to unmute users while not being connected, this
         also cancels all running unmute tasks. These tasks are being
         rescheduled once a new connection got established.
         """
-        for key in self.unmute_tasks:
-            try:
-                task = self.unmute_tasks.pop(key)
-            except KeyError:
-                pass
-            else:
-                task.cancel()
+        for task in self.unmute_tasks.values():
+            task.cancel()
+        self.unmute_tasks.clear()
+
+        if self.db_cache_refresh_task:
+            self.db_cache_refresh_task.cancel()
+            self.db_cache_refresh_task = None
+
+        self.room_nicks.clear()
 
         if self._connect_loop_wait_reconnect > 0:
-            self.event("reconnect_delay", self._connect_loop_wait_reconnect)
-            await asyncio.sleep(self._connect_loop_wait_reconnect)
+            delay = random.uniform(0, self._connect_loop_wait_reconnect)  # noqa: S311
+            self.event("reconnect_delay", delay)
+            await asyncio.sleep(delay)
 
-        self._connect_loop_wait_reconnect = self._connect_loop_wait_reconnect * 2 + 1
+        self._connect_loop_wait_reconnect = min(
+            self._connect_loop_wait_reconnect * 2 + 1, MAX_RECONNECT_DELAY_SECONDS
+        )
 
         self.connect()
 
     async def _muc_presence_change(self, presence: MUCPresence) -> None:
         """Set mute state for joining players.
 
+        Also keeps track of the nicks of the users in the room.
+
         Arguments:
             presence (slixmpp.stanza.presence.Presence): Received
                 presence stanza.
 
         """
+        nick = str(presence["muc"]["nick"])
+        nick_lower = nick.lower()
+        room = presence["muc"]["room"]
+
+        room_nicks = self.room_nicks[room]
         if presence["type"] == "unavailable":
+            if room_nicks.get(nick_lower) == nick:
+                del room_nicks[nick_lower]
             return
+        room_nicks[nick_lower] = nick
 
-        nick = str(presence["muc"]["nick"])
-        jid = JID(presence["muc"]["jid"])
+        jid: JID = presence["muc"]["jid"]
         role = presence["muc"]["role"]
-        room = presence["muc"]["room"]
         logger.debug('User "%s" connected with a nick "%s".', jid, nick)
 
-        if not await self._check_matching_nick(jid, nick, JID(presence["muc"]["room"])):
+        if not await self._check_matching_nick(jid, nick, JID(room)):
             return
 
-        with self.db_session() as db:
-            mute_event = (
-                db.execute(
-                    select(MuteEvent)
-                    .filter_by(is_active=True)
-                    .filter_by(player=str(jid.bare).lower())
-                    .order_by(MuteEvent.mute_end.desc())
-                )
-                .scalars()
-                .first()
-            )
+        mute_end, mute_reason = self.active_mutes.get(jid.bare, (None, None))
+        is_muted = mute_end is not None and mute_end > datetime.now(tz=UTC)
 
-        if mute_event and role == "participant":
+        if is_muted and role == "participant":
             try:
-                await self.plugin["xep_0045"].set_role(
-                    room, nick, "visitor", reason=mute_event.reason
-                )
+                await self.plugin["xep_0045"].set_role(room, nick, "visitor", reason=mute_reason)
             except IqError:
                 logger.exception("Muting %s (%s) on join failed.", nick, jid)
-        elif not mute_event and role == "visitor":
+        elif not is_muted and role == "visitor":
             try:
                 await self.plugin["xep_0045"].set_role(room, nick, "participant")
             except IqError:
@@ -448,15 +880,14 @@ class ModBot(ClientXMPP):
         if msg["delay"]["stamp"]:
             return
 
-        if msg["mucnick"] == self.nick or self.nick.lower() not in msg["body"].lower():
+        if msg["mucnick"] == self.nick or self.nick_lower not in msg["body"].lower():
             return
 
-        if self.last_info_msg and self.last_info_msg + timedelta(
-            seconds=INFO_MSG_COOLDOWN_SECONDS
-        ) > datetime.now(tz=UTC):
+        now = time.monotonic()
+        if self.last_info_msg and now - self.last_info_msg < INFO_MSG_COOLDOWN_SECONDS:
             return
 
-        self.last_info_msg = datetime.now(tz=UTC)
+        self.last_info_msg = now
         self.send_message(
             mto=msg["from"].bare,
             mbody="I am just a bot and I'm here to monitor that you respect the "
@@ -480,6 +911,13 @@ class ModBot(ClientXMPP):
         if msg["mucnick"] == self.nick:
             return
 
+        msg_body = msg["body"]
+
+        # Messages without any letters, like emojis or numbers, can't
+        # contain profanity terms.
+        if not any(char.isalpha() for char in msg_body):
+            return
+
         user = JID(
             self.plugin["xep_0045"].get_jid_property(msg["from"].bare, msg["mucnick"], "jid")
         )
@@ -489,80 +927,29 @@ class ModBot(ClientXMPP):
             )
             user = JID(f'{msg["mucnick"].lower()}@{self.boundjid.domain}')
 
-        msg_body = msg["body"]
         room = msg["muc"]["room"]
 
-        detected_languages = self.language_detector.proportion_in_each_language(msg_body)
-        detected_languages_sorted = sorted(
-            detected_languages.items(), key=lambda x: x[1], reverse=True
-        )
-
-        if detected_languages_sorted[0][0] == "unk":
-            languages = ("en",)
-            logger.debug('Couldn\'t detect language of the following text: "%s"', msg_body)
-        else:
-            languages = tuple(
-                key for key, value in detected_languages_sorted if key != "unk" and value == 1.0
-            )
-            if not languages:
-                languages = (detected_languages_sorted[0][0], "en")
-            logger.debug(
-                'Detected languages "%s" for the following text: "%s"',
-                ", ".join(languages),
-                msg_body,
-            )
+        languages = self._detect_languages(msg_body)
+        profanity_regex = self._get_profanity_regex(languages)
+        if not profanity_regex:
+            return
 
-        online_users = {name.lower() for name in self.plugin["xep_0045"].get_roster(room)}
-        tokens = [
-            token
+        # Lowercase nicks of the users currently in the room
+        online_users = self.room_nicks.get(room, {})
+        lemmatize = self.text_lemmatizer.lemmatize
+        tokens_lemmatized = [
+            lemmatize(token, lang=languages).lower()
             for token in simple_tokenizer(msg_body)
-            if token.lower() not in online_users and token not in string.punctuation
+            if token not in PUNCTUATION_CHARACTERS and token.lower() not in online_users
         ]
 
-        tokens_lemmatized = []
-        for token in tokens:
-            tokens_lemmatized.append(self.text_lemmatizer.lemmatize(token, lang=languages).lower())
-
-        with self.db_session() as db:
-            profanity_terms = set(
-                db.execute(
-                    select(ProfanityTerms.term).filter(ProfanityTerms.language.in_(languages))
-                ).scalars()
-            )
-            if not profanity_terms:
-                return
-
-            offending_terms = re.findall(
-                r"(?:^|(?<= ))(" + "|".join(profanity_terms) + r")(?= |$)",
-                " ".join(tokens_lemmatized),
-            )
-            if not offending_terms:
-                return
-
-            profanity_incident = ProfanityIncident(
-                player=str(user.bare),
-                room=room,
-                offending_content=msg_body,
-                matched_terms=sorted(offending_terms),
-                detected_languages=languages,
-            )
-            db.add(profanity_incident)
-            db.commit()
+        offending_terms = profanity_regex.findall(" ".join(tokens_lemmatized))
+        if not offending_terms:
+            return
 
-            existing_incidents = next(
-                iter(
-                    db.execute(
-                        select(func.count("*"))
-                        .select_from(ProfanityIncident)
-                        .filter(ProfanityIncident.player == str(user.bare))
-                        .filter(
-                            ProfanityIncident.timestamp
-                            >= datetime.now(tz=UTC)
-                            - timedelta(minutes=PROFANITY_MUTE_WINDOW_MINUTES)
-                        )
-                    ).scalars()
-                )
-            )
+        existing_incidents = self._add_profanity_incident(
+            user, room, msg_body, offending_terms, languages
+        )
 
         if existing_incidents < PROFANITY_MUTE_THRESHOLD:
             self.send_message(
@@ -584,6 +971,150 @@ class ModBot(ClientXMPP):
                 offending_content=msg_body,
             )
 
+    def _detect_languages(self, text: str) -> tuple[str, ...]:
+        """Detect the languages of a text.
+
+        Arguments:
+            text (str): text to detect the languages of
+
+        Returns:
+            Tuple of the codes of the detected languages
+
+        """
+        detected_languages = self.language_detector.proportion_in_each_language(text)
+        top_language = max(detected_languages, key=detected_languages.__getitem__)
+
+        if top_language == "unk":
+            logger.debug('Couldn\'t detect language of the following text: "%s"', text)
+            return ("en",)
+
+        languages = tuple(
+            key for key, value in detected_languages.items() if key != "unk" and value == 1.0
+        )
+        if not languages:
+            languages = (top_language, "en") if top_language != "en" else ("en",)
+        logger.debug(
+            'Detected languages "%s" for the following text: "%s"', ", ".join(languages), text
+        )
+        return languages
+
+    def _add_profanity_incident(
+        self,
+        user: JID,
+        room: str,
+        msg_body: str,
+        offending_terms: list[str],
+        languages: tuple[str, ...],
+    ) -> int:
+        """Record a profanity incident.
+
+        Arguments:
+            user (JID): JID of the user who used profanity
+            room (str): MUC room the message got sent to
+            msg_body (str): text of the message
+            offending_terms (list): profanity terms found in the
+                                    message
+            languages (tuple): detected languages of the message
+
+        Returns:
+            Number of profanity incidents of the user within the
+            profanity mute window, including this one
+
+        """
+        now = datetime.now(tz=UTC)
+        self.profanity_incident_buffer.append(
+            ProfanityIncident(
+                player=str(user.bare),
+                room=room,
+                offending_content=msg_body,
+                matched_terms=sorted(offending_terms),
+                detected_languages=languages,
+                timestamp=now,
+            )
+        )
+        self._trim_profanity_incident_buffer()
+        if not self.profanity_incident_flush_task:
+            self.profanity_incident_flush_task = create_task(self._flush_profanity_incidents())
+
+        recent_incidents = self.recent_profanity_incidents[str(user.bare)]
+        window_start = now - timedelta(minutes=PROFANITY_MUTE_WINDOW_MINUTES)
+        while recent_incidents and recent_incidents[0] < window_start:
+            recent_incidents.popleft()
+        recent_incidents.append(now)
+        return len(recent_incidents)
+
+    async def _flush_profanity_incidents(self) -> None:
+        """Write buffered profanity incidents to the database.
+
+        If writing them fails, another try gets scheduled. The delay
+        before each try doubles with every consecutive failure, up to
+        PROFANITY_INCIDENT_MAX_RETRY_SECONDS.
+        """
+        await asyncio.sleep(
+            min(
+                PROFANITY_INCIDENT_FLUSH_SECONDS * 2**self.profanity_incident_write_failures,
+                PROFANITY_INCIDENT_MAX_RETRY_SECONDS,
+            )
+        )
+        self.profanity_incident_flush_task = None
+
+        if not await self._write_profanity_incidents() and not self.profanity_incident_flush_task:
+            self.profanity_incident_flush_task = create_task(self._flush_profanity_incidents())
+
+    async def _write_profanity_incidents(self) -> bool:
+        """Write all buffered profanity incidents to the database.
+
+        Incidents which couldn't be written are put back into the
+        buffer, so they don't get lost.
+
+        Returns:
+            True if writing the incidents succeeded, False otherwise
+
+        """
+        profanity_incidents = self.profanity_incident_buffer
+        if not profanity_incidents:
+            return True
+        self.profanity_incident_buffer = []
+
+        def add_profanity_incidents() -> None:
+            with self.db_session() as db:
+                db.add_all(profanity_incidents)
+                db.commit()
+
+        try:
+            await self._db_run(add_profanity_incidents)
+        except Exception as exc:
+            self.profanity_incident_write_failures += 1
+            if self.profanity_incident_write_failures == 1:
+                logger.exception("Writing profanity incidents to the database failed.")
+            else:
+                logger.debug(
+                    "Writing profanity incidents to the database failed again (%d times): %s",
+                    self.profanity_incident_write_failures,
+                    exc,
+                )
+            self.profanity_incident_buffer[:0] = profanity_incidents
+            self._trim_profanity_incident_buffer()
+            return False
+        self.profanity_incident_write_failures = 0
+        return True
+
+    def _trim_profanity_incident_buffer(self) -> None:
+        """Drop the oldest buffered profanity incidents if too many.
+
+        This limits the memory used for buffered incidents while
+        writing them to the database keeps failing.
+        """
+        excess = len(self.profanity_incident_buffer) - MAX_BUFFERED_PROFANITY_INCIDENTS
+        if excess <= 0:
+            return
+        del self.profanity_incident_buffer[:excess]
+        logger.warning(
+            "Dropped %d buffered profanity incidents, as writing them to the database "
+            "keeps failing.",
+            excess,
+        )
+
     async def _muc_command_message(self, msg: Message) -> None:
         """Process messages in the command MUC room.
 
@@ -592,50 +1123,76 @@ class ModBot(ClientXMPP):
         Arguments:
             msg (Message): Received MUC message
         """
-        msg_body = msg["body"]
-
         if msg["delay"]["stamp"]:
             return
 
+        command = self._get_command(msg["body"])
+        if not command:
+            return
+
         moderator = JID(
             self.plugin["xep_0045"].get_jid_property(msg["from"].bare, msg["mucnick"], "jid")
         ).bare
 
-        try:
-            command = re.match(rf"({self.nick.lower()}:?\s*!?|!)(.+)", msg_body, re.IGNORECASE)[2]
-        except TypeError:
+        if not await self._is_moderator(moderator):
+            logger.warning(
+                "User %s, who is not a moderator, tried to execute a command", msg["from"]
+            )
             return
 
-        with self.db_session() as db:
-            if not db.get(Moderator, moderator):
-                logger.warning(
-                    "User %s, who is not a moderator, tried to execute a command", msg["from"]
-                )
-                return
-
         try:
-            args = self.cmd_parser.parse_args(shlex.split(command))
+            args = self.cmd_parser.parse_args(split_command(command))
         except ValueError as exc:
             self.send_message(mto=msg["from"].bare, mbody=str(exc), mtype="groupchat")
             return
 
-        if args.command == "mutelist":
-            await self.send_mutelist()
-            return
-        if args.command == "profanitylist":
-            await self.send_profanity_term_list(args.lang)
-            return
+        await self.cmd_handlers[args.command](args, JID(moderator))
 
+    async def _cmd_mute(self, args: Namespace, moderator: JID) -> None:
+        """Handle the mute command."""
         user = JID(args.user + "@" + self.boundjid.domain)
-        moderator = JID(moderator)
-        reason = " ".join(args.reason)
+        await self.mute_user(user, args.duration, moderator, " ".join(args.reason))
+
+    async def _cmd_mutelist(self, _args: Namespace, _moderator: JID) -> None:
+        """Handle the mutelist command."""
+        await self.send_mutelist()
+
+    async def _cmd_unmute(self, args: Namespace, moderator: JID) -> None:
+        """Handle the unmute command."""
+        user = JID(args.user + "@" + self.boundjid.domain)
+        await self.unmute_user(user, moderator, " ".join(args.reason))
+
+    async def _cmd_kick(self, args: Namespace, moderator: JID) -> None:
+        """Handle the kick command."""
+        user = JID(args.user + "@" + self.boundjid.domain)
+        await self.kick_user(user, moderator, " ".join(args.reason))
+
+    async def _cmd_profanitylist(self, args: Namespace, _moderator: JID) -> None:
+        """Handle the profanitylist command."""
+        await self.send_profanity_term_list(args.lang)
+
+    def _get_command(self, msg_body: str) -> str | None:
+        """Extract a command from a message.
 
-        if args.command == "mute":
-            await self.mute_user(user, args.duration, moderator, reason)
-        elif args.command == "unmute":
-            await self.unmute_user(user, moderator, reason)
-        elif args.command == "kick":
-            await self.kick_user(user, moderator, reason)
+        Commands are either prefixed with an exclamation mark or with
+        the nick of the bot, optionally followed by a colon and an
+        exclamation mark.
+
+        Arguments:
+            msg_body (str): text of the message
+
+        Returns:
+            The command without its prefix or None if the message
+            doesn't contain a command.
+
+        """
+        if msg_body.startswith("!"):
+            command = msg_body[1:]
+        elif msg_body[: len(self.nick_lower)].lower() == self.nick_lower:
+            command = msg_body[len(self.nick_lower) :].removeprefix(":").lstrip().removeprefix("!")
+        else:
+            return None
+        return command.split("\n", 1)[0] or None
 
     async def mute_user(
         self,
@@ -661,19 +1218,18 @@ class ModBot(ClientXMPP):
         """
         user.resource = None
 
-        dateparser_settings = {
-            "TIMEZONE": "UTC",
-            "RETURN_AS_TIMEZONE_AWARE": True,
-            "PREFER_DATES_FROM": "future",
-        }
-        # Workaround for https://github.com/scrapinghub/dateparser/issues/1012
-        duration = re.sub(r"(\d)([dhms])(\d)", r"\1\2 \3", duration)
-        mute_end: datetime = dateparser.parse(duration, settings=dateparser_settings)
-        if not mute_end or (
-            not datetime.now(tz=UTC)
-            < mute_end
-            <= dateparser.parse("5 years", settings=dateparser_settings)
-        ):
+        now = datetime.now(tz=UTC)
+        mute_duration = parse_duration(duration)
+        if mute_duration is None:
+            # Fall back to dateparser for durations using calendar
+            # based units, like months and years.
+            try:
+                mute_end = self.date_parser.get_date_data(duration).date_obj
+            except (OverflowError, ValueError):
+                mute_end = None
+            mute_duration = mute_end - now if mute_end else None
+
+        if not mute_duration or not timedelta(0) < mute_duration <= MAX_MUTE_DURATION:
             self.send_message(
                 mto=self.command_room,
                 mbody="The mute duration must be between 0 seconds and 5 years",
@@ -681,53 +1237,32 @@ class ModBot(ClientXMPP):
             )
             return
 
-        with self.db_session() as db:
-            active_mute = (
-                db.execute(
-                    select(MuteEvent)
-                    .filter_by(is_active=True)
-                    .filter_by(player=str(user))
-                    .order_by(MuteEvent.mute_end.desc())
-                )
-                .scalars()
-                .first()
-            )
-            if active_mute:
-                self.send_message(
-                    mto=self.command_room,
-                    mbody=f'"{user.node}" is already muted until '
-                    f"{active_mute.mute_end.strftime('%Y-%m-%d %H:%M:%S %Z')} "
-                    f"for the following reason:\n"
-                    f"> {active_mute.reason}",
-                    mtype="groupchat",
-                )
-                return
+        mute_end = now + mute_duration
 
-            mute_event = MuteEvent(
-                player=str(user), moderator=moderator.bare, mute_end=mute_end, reason=reason
+        active_mute = await self._db_run(self._add_mute_event, user, moderator, mute_end, reason)
+        if active_mute:
+            self.send_message(
+                mto=self.command_room,
+                mbody=f'"{user.node}" is already muted until '
+                f"{active_mute.mute_end.strftime('%Y-%m-%d %H:%M:%S %Z')} "
+                f"for the following reason:\n"
+                f"> {active_mute.reason}",
+                mtype="groupchat",
             )
-            db.add(mute_event)
-            db.commit()
+            return
 
-        for room in self.rooms:
-            nick = self._get_nick_with_proper_case(user.node, room)
-            if not nick:
-                continue
-            try:
-                await self.plugin["xep_0045"].set_role(room, nick, "visitor", reason=reason)
-            except IqError:
+        self.active_mutes[str(user)] = (mute_end, reason)
+
+        for room, nick, exc in await self._set_role_in_rooms(user, "visitor", reason):
+            if exc:
                 msg = f'Muting "{nick}" in {room} failed.'
-                logger.exception(msg)
+                logger.error(msg, exc_info=exc)
                 self.send_message(mto=self.command_room, mbody=msg, mtype="groupchat")
 
-        task = create_task(self._unmute_after_mute_ended(mute_end, user))
-        try:
-            old_task = self.unmute_tasks.pop(user)
-        except KeyError:
-            pass
-        else:
+        old_task = self.unmute_tasks.get(str(user))
+        if old_task:
             old_task.cancel()
-        self.unmute_tasks[user] = task
+        self.unmute_tasks[str(user)] = create_task(self._unmute_after_mute_ended(mute_end, user))
 
         if interactive:
             self.send_message(
@@ -745,30 +1280,60 @@ class ModBot(ClientXMPP):
                 mtype="groupchat",
             )
 
-    async def send_mutelist(self) -> None:
-        """Send a list of muted users to the command MUC room."""
-        muted_users = {}
-        max_nick_length = 0
-        message_content = []
+    def _add_mute_event(
+        self, user: JID, moderator: JID, mute_end: datetime, reason: str
+    ) -> Row[tuple[datetime, str]] | None:
+        """Add a mute event unless the user is muted already.
+
+        Arguments:
+            user (JID): JID of the user to mute
+            moderator (JID): JID of the moderator who issued the mute
+                             event
+            mute_end (datetime): datetime until the user is muted
+            reason (str): reason for muting the user
 
+        Returns:
+            The end and reason of the active mute of the user, if the
+            user is muted already, None otherwise.
+
+        """
         with self.db_session() as db:
-            for mute in db.execute(
-                select(MuteEvent).filter_by(is_active=True).order_by(MuteEvent.player)
-            ).scalars():
-                nick = JID(mute.player).node
-                muted_users[nick] = mute
-                max_nick_length = max(max_nick_length, len(nick))
-
-            for nick, mute in muted_users.items():
-                message_content.append(
-                    f"{nick.ljust(max_nick_length)}\t"
-                    f"{mute.mute_end.strftime('%Y-%m-%d %H:%M:%S %Z')}\t{mute.reason}"
-                )
+            active_mute = db.execute(
+                select(MuteEvent.mute_end, MuteEvent.reason)
+                .filter_by(is_active=True)
+                .filter_by(player=str(user))
+                .order_by(MuteEvent.mute_end.desc())
+                .limit(1)
+            ).first()
+            if active_mute:
+                return active_mute
+
+            mute_event = MuteEvent(
+                player=str(user), moderator=moderator.bare, mute_end=mute_end, reason=reason
+            )
+            db.add(mute_event)
+            db.commit()
+            return None
+
+    async def send_mutelist(self) -> None:
+        """Send a list of muted users to the command MUC room."""
+        now = datetime.now(tz=UTC)
+        muted_users = sorted(
+            (player.split("@", 1)[0], mute_end, reason)
+            for player, (mute_end, reason) in self.active_mutes.items()
+            if mute_end > now
+        )
 
         if muted_users:
+            max_nick_length = max(len(nick) for nick, _, _ in muted_users)
             header = "*nick*".ljust(max_nick_length) + "\t*muted until*".ljust(23) + "\t*reason*\n"
+            message_content = "\n".join(
+                f"{nick.ljust(max_nick_length)}\t"
+                f"{mute_end.strftime('%Y-%m-%d %H:%M:%S %Z')}\t{reason}"
+                for nick, mute_end, reason in muted_users
+            )
             self.send_message(
-                mto=self.command_room, mbody=header + "\n".join(message_content), mtype="groupchat"
+                mto=self.command_room, mbody=header + message_content, mtype="groupchat"
             )
             return
 
@@ -787,27 +1352,25 @@ class ModBot(ClientXMPP):
         """
         user.resource = None
 
-        with self.db_session() as db:
-            unmute_event = UnmuteEvent(player=str(user), moderator=moderator.bare, reason=reason)
-            db.add(unmute_event)
-            db.commit()
+        def add_unmute_event() -> None:
+            with self.db_session() as db:
+                unmute_event = UnmuteEvent(
+                    player=str(user), moderator=moderator.bare, reason=reason
+                )
+                db.add(unmute_event)
+                db.commit()
 
-        for room in self.rooms:
-            nick = self._get_nick_with_proper_case(user.node, room)
-            if not nick:
-                continue
-            try:
-                await self.plugin["xep_0045"].set_role(room, nick, "participant", reason=reason)
-            except IqError:
+        await self._db_run(add_unmute_event)
+        self.active_mutes.pop(str(user), None)
+
+        for room, nick, exc in await self._set_role_in_rooms(user, "participant", reason):
+            if exc:
                 msg = f'Unmuting "{nick}" in {room} failed.'
-                logger.exception(msg)
+                logger.error(msg, exc_info=exc)
                 self.send_message(mto=self.command_room, mbody=msg, mtype="groupchat")
 
-        try:
-            task = self.unmute_tasks.pop(user)
-        except KeyError:
-            pass
-        else:
+        task = self.unmute_tasks.pop(str(user), None)
+        if task:
             task.cancel()
 
         self.send_message(
@@ -825,21 +1388,19 @@ class ModBot(ClientXMPP):
         """
         user.resource = None
 
-        with self.db_session() as db:
-            kick_event = KickEvent(player=str(user), moderator=moderator.bare, reason=reason)
-            db.add(kick_event)
-            db.commit()
+        def add_kick_event() -> None:
+            with self.db_session() as db:
+                kick_event = KickEvent(player=str(user), moderator=moderator.bare, reason=reason)
+                db.add(kick_event)
+                db.commit()
+
+        await self._db_run(add_kick_event)
 
         rooms_kicked_from = []
         rooms_kick_failed = []
-        for room in self.rooms:
-            nick = self._get_nick_with_proper_case(user.node, room)
-            if not nick:
-                continue
-            try:
-                await self.plugin["xep_0045"].set_role(room, nick, "none", reason=reason)
-            except IqError:
-                logger.exception('Kicking "%s" from %s failed', user, room)
+        for room, _, exc in await self._set_role_in_rooms(user, "none", reason):
+            if exc:
+                logger.error('Kicking "%s" from %s failed', user, room, exc_info=exc)
                 rooms_kick_failed.append(room)
                 continue
 
@@ -854,7 +1415,7 @@ class ModBot(ClientXMPP):
             )
             return
 
-        rooms_kicked_from_str = ", ".join([str(room.local) for room in rooms_kicked_from])
+        rooms_kicked_from_str = ", ".join(str(room.local) for room in rooms_kicked_from)
         self.send_message(
             mto=self.command_room,
             mbody=f'Kicked "{user.node}" from the following MUC rooms: '
@@ -863,7 +1424,7 @@ class ModBot(ClientXMPP):
         )
 
         if rooms_kick_failed:
-            rooms_kick_failed_str = {", ".join([str(room.local) for room in rooms_kick_failed])}
+            rooms_kick_failed_str = ", ".join(str(room.local) for room in rooms_kick_failed)
             self.send_message(
                 mto=self.command_room,
                 mbody=f'Kicking "{user.node}" failed for the following MUC '
@@ -879,22 +1440,20 @@ class ModBot(ClientXMPP):
             lang (str): Language to list the profanity terms for
         """
         lang = lang.lower()
-        if lang in ["lang", "languages"]:
-            languages = sorted(PROFANITY_SUPPORTED_LANGUAGES.values())
+        if lang in {"lang", "languages"}:
             self.send_message(
                 mto=self.command_room,
                 mbody="Languages currently supported for profanity detection:\n"
-                f"{', '.join(languages)}",
+                f"{', '.join(sorted(PROFANITY_SUPPORTED_LANGUAGES.values()))}",
                 mtype="groupchat",
             )
             return
 
-        lang_code = lang if lang in PROFANITY_SUPPORTED_LANGUAGES else None
-        if not lang_code:
-            for key, value in PROFANITY_SUPPORTED_LANGUAGES.items():
-                if value.lower() == lang:
-                    lang_code = key
-                    break
+        lang_code = (
+            lang
+            if lang in PROFANITY_SUPPORTED_LANGUAGES
+            else PROFANITY_SUPPORTED_LANGUAGE_CODES.get(lang)
+        )
 
         if not lang_code:
             self.send_message(
@@ -904,14 +1463,7 @@ class ModBot(ClientXMPP):
             )
             return
 
-        with self.db_session() as db:
-            terms = list(
-                db.execute(
-                    select(ProfanityTerms.term)
-                    .filter_by(language=lang_code)
-                    .order_by(ProfanityTerms.term)
-                ).scalars()
-            )
+        terms = sorted(self.profanity_terms.get(lang_code, ()))
         if not terms:
             self.send_message(
                 mto=self.command_room,
@@ -921,12 +1473,10 @@ class ModBot(ClientXMPP):
             )
             return
 
-        msg = (
-            "Profanity terms currently being monitored for "
-            f"{PROFANITY_SUPPORTED_LANGUAGES[lang_code]}:\n"
-        )
-        msg += "".join(f"- {term}\n" for term in terms)
-        self.send_message(mto=self.command_room, mbody=msg, mtype="groupchat")
+        language = PROFANITY_SUPPORTED_LANGUAGES[lang_code]
+        header = f"Profanity terms currently being monitored for {language}:"
+        body = "\n".join(f"- {term}" for term in terms)
+        self.send_message(mto=self.command_room, mbody=f"{header}\n{body}\n", mtype="groupchat")
 
     async def _check_matching_nick(self, jid: JID, nick: str, room: JID) -> bool:
         """Kick users whose local JID part doesn't match their nick.
@@ -944,16 +1494,21 @@ class ModBot(ClientXMPP):
         if jid.node.lower() == nick.lower():
             return True
 
-        if jid.bare == self.boundjid.bare:
+        bare_jid = jid.bare
+        if bare_jid == self.boundjid.bare:
             return True
 
-        with self.db_session() as db:
-            whitelist = db.scalars(select(JIDNickWhitelist.jid)).all()
-            if jid.bare in whitelist:
+        if bare_jid in self.jid_nick_whitelist:
+            return True
+
+        # Reload the whitelist to pick up recent additions, before
+        # kicking the user.
+        if self._may_reload_cache("jid_nick_whitelist"):
+            self.jid_nick_whitelist = await self._db_run(self._get_jid_nick_whitelist)
+            if bare_jid in self.jid_nick_whitelist:
                 return True
 
-            reason = f"User {jid} connected with a nick different to their JID: {nick}"
-            logger.info(reason)
+        logger.info("User %s connected with a nick different to their JID: %s", jid, nick)
 
         try:
             await self.plugin["xep_0045"].set_role(
@@ -964,6 +1519,45 @@ class ModBot(ClientXMPP):
 
         return False
 
+    async def _set_role_in_rooms(
+        self, user: JID, role: str, reason: str = ""
+    ) -> list[tuple[JID, str, IqError | None]]:
+        """Set the role of a user in all MUC rooms the user is in.
+
+        The role changes for the different rooms are done concurrently.
+
+        Arguments:
+            user (JID): JID of the user to set the role for
+            role (str): role to set
+            reason (str): reason for the role change
+
+        Returns:
+            list with the room, the nick of the user and the IqError
+            raised if setting the role failed or None otherwise, for
+            each room the user is in.
+
+        """
+        room_nicks = []
+        for room in self.rooms:
+            nick = self._get_nick_with_proper_case(user.node, room)
+            if nick:
+                room_nicks.append((room, nick))
+
+        results = await asyncio.gather(
+            *(
+                self.plugin["xep_0045"].set_role(room, nick, role, reason=reason)
+                for room, nick in room_nicks
+            ),
+            return_exceptions=True,
+        )
+
+        role_changes = []
+        for (room, nick), result in zip(room_nicks, results, strict=True):
+            if isinstance(result, BaseException) and not isinstance(result, IqError):
+                raise result
+            role_changes.append((room, nick, result if isinstance(result, IqError) else None))
+        return role_changes
+
     def _get_nick_with_proper_case(self, nick: str, room: JID) -> str | None:
         """Get the case-sensitive version of a case-insensitive nick.
 
@@ -977,11 +1571,7 @@ class ModBot(ClientXMPP):
             str with the case-sensitive nick of the user if found or
             None otherwise.
         """
-        roster = self.plugin["xep_0045"].get_roster(room)
-        for roster_nick in roster:
-            if roster_nick.lower() == nick.lower():
-                return roster_nick
-        return None
+        return self.room_nicks.get(str(room), {}).get(nick.lower())
 
     async def _unmute_after_mute_ended(self, unmute_dt: datetime, user: JID) -> None:
         """Unmute a user after a given time.
@@ -993,21 +1583,18 @@ class ModBot(ClientXMPP):
         """
         delay = unmute_dt - datetime.now(tz=UTC)
         try:
-            await asyncio.sleep(delay.total_seconds())
+            await asyncio.sleep(max(0.0, delay.total_seconds()))
         except CancelledError:
             return
 
-        for room in self.rooms:
-            nick = self._get_nick_with_proper_case(user.node, room)
-            if not nick:
-                continue
-            try:
-                await self.plugin["xep_0045"].set_role(room, nick, "participant")
-            except IqError:
-                logger.exception("Automatically unmuting %s in %s failed.", nick, room)
+        self.active_mutes.pop(str(user), None)
+
+        for room, nick, exc in await self._set_role_in_rooms(user, "participant"):
+            if exc:
+                logger.error("Automatically unmuting %s in %s failed.", nick, room, exc_info=exc)
 
         try:
-            del self.unmute_tasks[user]
+            del self.unmute_tasks[str(user)]
         except KeyError:
             pass
 
@@ -1097,6 +1684,8 @@ def main():
     )
     logger.setLevel(log_level)
 
+    install_uvloop()
+
     xmpp = ModBot(
         JID(f"{args.login}@{args.domain}/CC"),
         args.password,
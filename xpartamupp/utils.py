@@ -16,9 +16,16 @@
 
 """Collection of utility functions used by the XMPP-bots."""
 
+import asyncio
+import ssl
 import tomllib
-from argparse import ArgumentParser, Namespace
+from argparse import SUPPRESS, ArgumentParser, Namespace
 from collections.abc import Sequence
+from functools import cache
+
+
+# Maximum number of seconds to wait before trying to reconnect
+MAX_RECONNECT_DELAY_SECONDS = 5 * 60
 
 
 class ArgumentParserWithConfigFile(ArgumentParser):
@@ -63,14 +70,12 @@ class ArgumentParserWithConfigFile(ArgumentParser):
 
         delattr(parsed_args, "config_file")
 
-        default_args = vars(super().parse_args([]))
-        changed_args = []
-
-        for key, value in vars(parsed_args).items():
-            if key in default_args and value == default_args[key]:
-                continue
-
-            changed_args.append(key)
+        default_args = self._get_defaults()
+        changed_args = {
+            key
+            for key, value in vars(parsed_args).items()
+            if key not in default_args or value != default_args[key]
+        }
 
         for key, value in toml_data.items():
             if key not in default_args:
@@ -80,3 +85,53 @@ class ArgumentParserWithConfigFile(ArgumentParser):
             setattr(parsed_args, key, value)
 
         return parsed_args
+
+    def _get_defaults(self) -> dict:
+        """Get the default values of all arguments.
+
+        This returns the same values parsing an empty list of arguments
+        would result in, without actually having to parse them.
+
+        Returns:
+            dict with the default value for each destination variable
+
+        """
+        defaults = {}
+        for action in self._actions:
+            if action.dest is SUPPRESS or action.default is SUPPRESS:
+                continue
+            default = action.default
+            if isinstance(default, str):
+                default = self._get_value(action, default)
+            defaults.setdefault(action.dest, default)
+        for dest, default in self._defaults.items():
+            defaults.setdefault(dest, default)
+        return defaults
+
+
+def install_uvloop() -> None:
+    """Use uvloop as asyncio event loop, if it's installed.
+
+    This has to be called before the XMPP client gets created, as the
+    client gets bound to the event loop on creation.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+@cache
+def get_unverified_ssl_context() -> ssl.SSLContext:
+    """Return an SSL context which doesn't verify certificates.
+
+    The context is created only once and shared by all callers, so
+    bots don't have to modify the context they got created with when
+    certificate verification is disabled.
+    """
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
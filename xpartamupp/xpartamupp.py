@@ -19,37 +19,108 @@
 
 import asyncio
 import logging
-import ssl
+import random
 import time
 from argparse import ArgumentDefaultsHelpFormatter
 from asyncio import Future
-from datetime import UTC, datetime, timedelta
+from dataclasses import dataclass, field
 
-from cachetools import FIFOCache
 from slixmpp import ClientXMPP
 from slixmpp.jid import JID
 from slixmpp.stanza import Iq
+from slixmpp.xmlstream import ET
 from slixmpp.xmlstream.handler import Callback
 from slixmpp.xmlstream.matcher import StanzaPath
 from slixmpp.xmlstream.stanzabase import register_stanza_plugin
 
 from xpartamupp.stanzas import GameListXmppPlugin
-from xpartamupp.utils import ArgumentParserWithConfigFile
+from xpartamupp.utils import (
+    MAX_RECONNECT_DELAY_SECONDS,
+    ArgumentParserWithConfigFile,
+    get_unverified_ssl_context,
+    install_uvloop,
+)
 
 
 # Number of seconds to not respond to mentions after having responded
 # to a mention.
 INFO_MSG_COOLDOWN_SECONDS = 15 * 60
 
+# Number of seconds to wait before broadcasting a changed game list,
+# so multiple changes in quick succession result in a single broadcast.
+GAME_LIST_BROADCAST_DELAY_SECONDS = 0.1
+
+# Maximum number of games to keep track of. If more games get
+# registered, the oldest ones get dropped.
+MAX_GAMES = 2**7
+
+# Game attributes which aren't supposed to change after registering a
+# game.
+IMMUTABLE_GAME_ATTRIBUTES = frozenset({"IP", "name", "hostJID", "hostUsername", "mods"})
+
+# Matcher for IQs containing game list changes. It's stateless, so a
+# single instance can be shared by all bot instances.
+IQ_GAME_LIST_MATCHER = StanzaPath("iq@type=set/gamelist")
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class GameEntry:
+    """Information about a game registered in the lobby.
+
+    The properties which change while a game is running are stored as
+    separate attributes, all other information about the game is
+    stored as received in `attributes`.
+    """
+
+    players: str
+    nbp: str
+    state: str
+    players_init: str
+    nbp_init: str
+    attributes: dict[str, str] = field(default_factory=dict)
+    # XML element of the game for game list stanzas, built when needed
+    # and reset whenever the game changes
+    element: ET.Element | None = field(default=None, repr=False, compare=False)
+
+    def to_dict(self):
+        """Return the information about the game as dict.
+
+        Returns:
+            dict with the information about the game as it gets sent
+            to clients
+
+        """
+        data = dict(self.attributes)
+        data["players"] = self.players
+        data["nbp"] = self.nbp
+        data["state"] = self.state
+        data["players-init"] = self.players_init
+        data["nbp-init"] = self.nbp_init
+        return data
+
+    def to_element(self):
+        """Return the information about the game as XML element.
+
+        Returns:
+            ET.Element with the information about the game as it
+            gets sent to clients in game lists
+
+        """
+        if self.element is None:
+            data = self.to_dict()
+            data.pop("ip", None)  # Don't send the IP address with the gamelist.
+            self.element = ET.Element("game", data)
+        return self.element
+
+
 class Games:
     """Class to tracks all games in the lobby."""
 
     def __init__(self):
         """Initialize with empty games."""
-        self.games = FIFOCache(maxsize=2**7)
+        self.games = {}
 
     def add_game(self, jid, data):
         """Add a game.
@@ -63,31 +134,86 @@ class Games:
 
         """
         try:
-            data["players-init"] = data["players"]
-            data["nbp-init"] = data["nbp"]
-            data["state"] = "init"
-            data["name"] = data["name"][:256]
+            game = GameEntry(
+                players=data["players"],
+                nbp=data["nbp"],
+                state="init",
+                players_init=data["players"],
+                nbp_init=data["nbp"],
+                attributes={
+                    key: value
+                    for key, value in data.items()
+                    if key not in {"players", "nbp", "state", "players-init", "nbp-init"}
+                },
+            )
+            game.attributes["name"] = data["name"][:256]
         except (KeyError, TypeError, ValueError):
             logger.warning("Received invalid data for add game from %s: %s", jid, data)
             return False
         else:
-            if jid not in self.games:
+            # Re-registered games count as new ones when dropping the
+            # oldest games, so they get removed and added again.
+            old_game = self.games.pop(jid, None)
+            if old_game is None:
                 logger.info('%s registered a game with the name "%s"', jid, data.get("name"))
             else:
-                immutable_keys = ["IP", "name", "hostJID", "hostUsername", "mods"]
-                for key, value in data.items():
-                    if key in immutable_keys and self.games[jid].get(key) != value:
+                old_attributes = old_game.attributes
+                for key, value in game.attributes.items():
+                    if key in IMMUTABLE_GAME_ATTRIBUTES and old_attributes.get(key) != value:
                         logger.warning(
                             'Game hosted by %s changed immutable property "%s": ' '"%s" -> "%s"',
                             jid,
                             key,
-                            self.games[jid].get(key),
+                            old_attributes.get(key),
                             value,
                         )
 
-            self.games[jid] = data
+            if len(self.games) >= MAX_GAMES:
+                self._drop_oldest_game()
+            self.games[jid] = game
             return True
 
+    def _drop_oldest_game(self):
+        """Drop the oldest game which didn't start yet.
+
+        Games which already started only get dropped if there is no
+        other game left, so long-running games don't get dropped when
+        lots of games get registered in a short amount of time.
+        """
+        # Dicts keep their insertion order, so the first game is the
+        # oldest one.
+        jid = next(
+            (jid for jid, game in self.games.items() if game.state == "init"),
+            next(iter(self.games)),
+        )
+        logger.info("Dropping game of %s, as too many games are registered", jid)
+        del self.games[jid]
+
+    def __contains__(self, jid):
+        """Check whether a player hosts a game.
+
+        Arguments:
+            jid (JID): JID of the player to check
+
+        Returns:
+            True if the player hosts a game, False if not
+
+        """
+        return jid in self.games
+
+    def get_game_elements(self, hosts):
+        """Return the XML elements of the games of some hosts.
+
+        Arguments:
+            hosts (set): JIDs of the hosts to return the games of
+
+        Returns:
+            list with the XML elements of the games of the given
+            hosts, in the order the games got registered
+
+        """
+        return [game.to_element() for jid, game in self.games.items() if jid in hosts]
+
     def remove_game(self, jid):
         """Remove a game attached to a JID.
 
@@ -98,23 +224,20 @@ class Games:
             True if removing the game succeeded, False if not
 
         """
-        try:
-            del self.games[jid]
-        except KeyError:
+        if self.games.pop(jid, None) is None:
             logger.warning("Game for jid %s didn't exist", jid)
             return False
-        else:
-            return True
+        return True
 
     def get_all_games(self):
         """Return all games.
 
         Returns:
-            dict containing all games with the JID of the player who
-            started the game as key.
+            dict containing the information about all games with the
+            JID of the player who started the game as key.
 
         """
-        return self.games
+        return {jid: game.to_dict() for jid, game in self.games.items()}
 
     def change_game_state(self, jid, data):
         """Switch game state between running and waiting.
@@ -127,35 +250,27 @@ class Games:
             True if changing the game state succeeded, False if not
 
         """
-        if jid not in self.games:
+        game = self.games.get(jid)
+        if game is None:
             logger.warning("Tried to change state for non-existent game %s", jid)
             return False
 
+        game.element = None
         try:
-            if self.games[jid]["nbp-init"] > data["nbp"]:
-                logger.debug(
-                    "change game (%s) state from %s to %s",
-                    jid,
-                    self.games[jid]["state"],
-                    "waiting",
-                )
-                self.games[jid]["state"] = "waiting"
+            if game.nbp_init > data["nbp"]:
+                logger.debug("change game (%s) state from %s to %s", jid, game.state, "waiting")
+                game.state = "waiting"
             else:
-                logger.debug(
-                    "change game (%s) state from %s to %s",
-                    jid,
-                    self.games[jid]["state"],
-                    "running",
-                )
-                self.games[jid]["state"] = "running"
-            self.games[jid]["nbp"] = data["nbp"]
-            self.games[jid]["players"] = data["players"]
+                logger.debug("change game (%s) state from %s to %s", jid, game.state, "running")
+                game.state = "running"
+            game.nbp = data["nbp"]
+            game.players = data["players"]
         except (KeyError, ValueError):
             logger.warning("Received invalid data for change game state from %s: %s", jid, data)
             return False
         else:
-            if "startTime" not in self.games[jid]:
-                self.games[jid]["startTime"] = str(round(time.time()))
+            if "startTime" not in game.attributes:
+                game.attributes["startTime"] = str(round(time.time()))
             return True
 
 
@@ -178,8 +293,7 @@ class XpartaMuPP(ClientXMPP):
         super().__init__(sjid, password)
 
         if not verify_certificate:
-            self.ssl_context.check_hostname = False
-            self.ssl_context.verify_mode = ssl.CERT_NONE
+            self.ssl_context = get_unverified_ssl_context()
 
         self.whitespace_keepalive = False
 
@@ -188,15 +302,31 @@ class XpartaMuPP(ClientXMPP):
 
         self.room = room
         self.nick = nick
+        self.nick_lower = nick.lower()
 
         self.games = Games()
+        # JIDs of the 0 A.D. clients in the MUC room
+        self.online_jids = set()
+        self.game_list_broadcast = None
+        # Game list stanza for the current games, which gets rebuilt
+        # when needed after the games changed
+        self.game_list_stanza = None
+        self.game_list_outdated = True
+        # Game list stanza which got last broadcasted to all clients
+        self.broadcasted_game_list_stanza = None
 
         self.last_info_msg = None
 
+        self.game_command_handlers = {
+            "register": self.games.add_game,
+            "unregister": lambda jid, _: self.games.remove_game(jid),
+            "changestate": self.games.change_game_state,
+        }
+
         register_stanza_plugin(Iq, GameListXmppPlugin)
 
         self.register_handler(
-            Callback("Iq Gamelist", StanzaPath("iq@type=set/gamelist"), self._iq_game_list_handler)
+            Callback("Iq Gamelist", IQ_GAME_LIST_MATCHER, self._iq_game_list_handler)
         )
 
         self.add_event_handler("session_start", self._session_start)
@@ -214,6 +344,10 @@ class XpartaMuPP(ClientXMPP):
 
         """
         self._connect_loop_wait_reconnect = 0
+        # Joining the MUC room results in presences for all users
+        # currently in it, which repopulate this.
+        self.online_jids.clear()
+        self.game_list_outdated = True
         await self.plugin["xep_0045"].join_muc_wait(self.room, self.nick)
         self.send_presence()
         self.get_roster()
@@ -237,19 +371,31 @@ class XpartaMuPP(ClientXMPP):
     async def _reconnect(self, _event):
         """Trigger a reconnection attempt.
 
-        This triggers a reconnection attempt and implements the same
-        back-off behavior as the ClientXMPP.connect() method does to
-        avoid too frequent reconnection tries.
+        This triggers a reconnection attempt and implements an
+        exponential back-off with random jitter to avoid too frequent
+        reconnection tries and multiple clients reconnecting at the
+        same time.
+
+        A pending game list broadcast gets cancelled, as clients get
+        sent the game list anyway once they show up in the MUC room
+        after reconnecting.
 
         Arguments:
             _event (dict): empty dummy dict
 
         """
+        if self.game_list_broadcast:
+            self.game_list_broadcast.cancel()
+            self.game_list_broadcast = None
+
         if self._connect_loop_wait_reconnect > 0:
-            self.event("reconnect_delay", self._connect_loop_wait_reconnect)
-            await asyncio.sleep(self._connect_loop_wait_reconnect)
+            delay = random.uniform(0, self._connect_loop_wait_reconnect)  # noqa: S311
+            self.event("reconnect_delay", delay)
+            await asyncio.sleep(delay)
 
-        self._connect_loop_wait_reconnect = self._connect_loop_wait_reconnect * 2 + 1
+        self._connect_loop_wait_reconnect = min(
+            self._connect_loop_wait_reconnect * 2 + 1, MAX_RECONNECT_DELAY_SECONDS
+        )
 
         self.connect()
 
@@ -265,11 +411,14 @@ class XpartaMuPP(ClientXMPP):
 
         """
         nick = str(presence["muc"]["nick"])
-        jid = JID(presence["muc"]["jid"])
+        jid = presence["muc"]["jid"]
 
         if not jid.resource.startswith("0ad"):
             return
 
+        self.online_jids.add(jid)
+        if jid in self.games:
+            self.game_list_outdated = True
         self._send_game_list(jid)
 
         logger.debug("Client '%s' connected with a nick '%s'.", jid, nick)
@@ -286,13 +435,17 @@ class XpartaMuPP(ClientXMPP):
 
         """
         nick = str(presence["muc"]["nick"])
-        jid = JID(presence["muc"]["jid"])
+        jid = presence["muc"]["jid"]
 
         if not jid.resource.startswith("0ad"):
             return
 
-        if self.games.remove_game(jid):
-            self._send_game_list()
+        self.online_jids.discard(jid)
+
+        # Most leaving clients didn't host a game
+        if jid in self.games and self.games.remove_game(jid):
+            self.game_list_outdated = True
+            self._schedule_game_list_broadcast()
 
         logger.debug("Client '%s' with nick '%s' disconnected", jid, nick)
 
@@ -311,15 +464,18 @@ class XpartaMuPP(ClientXMPP):
         if msg["delay"]["stamp"]:
             return
 
-        if msg["mucnick"] == self.nick or self.nick.lower() not in msg["body"].lower():
+        if msg["mucnick"] == self.nick:
             return
 
-        if self.last_info_msg and self.last_info_msg + timedelta(
-            seconds=INFO_MSG_COOLDOWN_SECONDS
-        ) > datetime.now(tz=UTC):
+        body = msg["body"]
+        if len(body) < len(self.nick_lower) or self.nick_lower not in body.lower():
             return
 
-        self.last_info_msg = datetime.now(tz=UTC)
+        now = time.monotonic()
+        if self.last_info_msg and now - self.last_info_msg < INFO_MSG_COOLDOWN_SECONDS:
+            return
+
+        self.last_info_msg = now
         self.send_message(
             mto=msg["from"].bare,
             mbody="I am just a bot and I'm responsible to ensure that you're able "
@@ -335,18 +491,17 @@ class XpartaMuPP(ClientXMPP):
             iq (IQ): Received IQ stanza
 
         """
-        if not iq["from"].resource.startswith("0ad"):
+        sender = iq["from"]
+        if not sender.resource.startswith("0ad"):
             return
 
         success = False
 
-        command = iq["gamelist"]["command"]
-        if command == "register":
-            success = self.games.add_game(iq["from"], iq["gamelist"]["game"])
-        elif command == "unregister":
-            success = self.games.remove_game(iq["from"])
-        elif command == "changestate":
-            success = self.games.change_game_state(iq["from"], iq["gamelist"]["game"])
+        gamelist = iq["gamelist"]
+        command = gamelist["command"]
+        handler = self.game_command_handlers.get(command)
+        if handler:
+            success = handler(sender, gamelist["game"])
         else:
             logger.info('Received unknown game command: "%s"', command)
 
@@ -356,10 +511,49 @@ class XpartaMuPP(ClientXMPP):
         iq.send()
 
         if success:
-            try:
-                self._send_game_list()
-            except Exception:
-                logger.exception('Failed to send game list after "%s" command', command)
+            self.game_list_outdated = True
+            self._schedule_game_list_broadcast()
+
+    def _schedule_game_list_broadcast(self):
+        """Schedule broadcasting the game list to all clients.
+
+        Changes to the game list which happen while a broadcast is
+        already scheduled get sent with that broadcast.
+        """
+        if self.game_list_broadcast:
+            return
+
+        self.game_list_broadcast = self.loop.call_later(
+            GAME_LIST_BROADCAST_DELAY_SECONDS, self._broadcast_game_list
+        )
+
+    def _broadcast_game_list(self):
+        """Broadcast the game list to all clients."""
+        self.game_list_broadcast = None
+        try:
+            self._send_game_list()
+        except Exception:
+            logger.exception("Failed to broadcast game list")
+
+    def _get_game_list_stanza(self):
+        """Get a stanza with the games of all online hosts.
+
+        If the games changed, but the resulting stanza is the same as
+        before, the previous stanza gets returned.
+
+        Returns:
+            GameListXmppPlugin with the current games
+
+        """
+        if self.game_list_outdated:
+            stanza = GameListXmppPlugin()
+            stanza.xml.extend(self.games.get_game_elements(self.online_jids))
+
+            if self.game_list_stanza is None or str(stanza) != str(self.game_list_stanza):
+                self.game_list_stanza = stanza
+            self.game_list_outdated = False
+
+        return self.game_list_stanza
 
     def _send_game_list(self, to=None):
         """Send a massive stanza with the whole game list.
@@ -371,24 +565,15 @@ class XpartaMuPP(ClientXMPP):
             to (JID): Player to send the game list to.
                 If None, the game list will be broadcasted
         """
-        games = self.games.get_all_games()
-
-        online_jids = []
-        for nick in self.plugin["xep_0045"].get_roster(self.room):
-            online_jids.append(
-                JID(self.plugin["xep_0045"].get_jid_property(self.room, nick, "jid"))
-            )
-
-        stanza = GameListXmppPlugin()
-        for jid in games:
-            if jid in online_jids:
-                stanza.add_game(games[jid])
+        stanza = self._get_game_list_stanza()
 
         if not to:
-            for jid in online_jids:
-                if not jid.resource.startswith("0ad"):
-                    continue
+            if stanza is self.broadcasted_game_list_stanza:
+                logger.debug("Game list didn't change, skipping broadcast")
+                return
+            self.broadcasted_game_list_stanza = stanza
 
+            for jid in self.online_jids:
                 iq = self.make_iq_result(ito=jid)
                 iq.set_payload(stanza)
                 try:
@@ -472,6 +657,8 @@ def main():
     )
     logger.setLevel(log_level)
 
+    install_uvloop()
+
     xmpp = XpartaMuPP(
         JID(f"{args.login}@{args.domain}/CC"),
         args.password,